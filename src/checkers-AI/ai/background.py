@@ -0,0 +1,137 @@
+import threading
+import time
+from types import SimpleNamespace
+from config import RED, WHITE, PONDER
+
+
+class _Job:
+    def __init__(self, kind, key):
+        self.kind = kind
+        # Board.position the job's answer is for.
+        self.key = key
+        self.thread = None
+        self.result = None
+        self.error = None
+        # Ponder hit: when to stop pondering and play.
+        self.stop_at = None
+
+
+class BackgroundAgent:
+    """
+    Wraps an agent so Game never blocks on it.
+
+    get_move(board) starts the agent's search on a worker thread against a
+    copy of the board and returns None until the move is ready, so the
+    event loop keeps rendering; cancel() stops a search early through the
+    agent's `abort` flag. With `ponder`, agents that expose search() (i.e.
+    MinimaxAgent) keep working during the opponent's turn: ponder(board)
+    searches the position after the reply predicted by the last principal
+    variation. If the opponent plays it, the ponder search carries on for
+    the agent's normal time_limit and its move is played; otherwise it is
+    cancelled, and the new search still starts from the transposition
+    table the ponder search filled.
+    """
+    def __init__(self, agent, ponder=PONDER):
+        self.agent = agent
+        self.color = agent.color
+        self.ponder_enabled = ponder and hasattr(agent, "search")
+        # The agent's own budget; pondering clears agent.time_limit while it runs.
+        self.time_limit = getattr(agent, "time_limit", None)
+        self.abort = SimpleNamespace(value=0)
+        if hasattr(agent, "abort"):
+            agent.abort = self.abort
+        self._job = None
+        self.stats = {"ponder_hits": 0, "ponder_misses": 0}
+
+    @property
+    def thinking(self):
+        job = self._job
+        return job is not None and job.thread.is_alive()
+
+    def get_move(self, board):
+        """The move for `board` once the worker has it, else None (and the search is started)."""
+        job = self._job
+        if job is not None and job.key == board.position:
+            if job.kind == "ponder":
+                if job.stop_at is None:
+                    self.stats["ponder_hits"] += 1
+                    limit = self.time_limit
+                    job.stop_at = time.perf_counter() + limit if limit else float("inf")
+                if job.thread.is_alive() and time.perf_counter() < job.stop_at:
+                    return None
+                self.abort.value = 1
+            elif job.thread.is_alive():
+                return None
+            return self._collect()
+
+        if job is not None and job.kind == "ponder":
+            self.stats["ponder_misses"] += 1
+        self.cancel()
+        self._start("move", board.position, self._think, board.copy())
+        return None
+
+    def ponder(self, board):
+        """Called during the opponent's turn; starts at most one ponder search."""
+        if not self.ponder_enabled or self._job is not None or board.winner() is not None:
+            return
+        pv = self.agent.stats.get("pv") or []
+        if len(pv) < 2:
+            return
+        reply = pv[1]
+        opponent = RED if self.color == WHITE else WHITE
+        if reply not in board.legal_moves(opponent):
+            return
+        predicted = board.copy()
+        predicted.apply_move(reply)
+        if reply[2] >= 0 and predicted.piece_jumps(reply[1]):
+            # The reply continues a multi-jump; too far ahead to guess.
+            return
+        self._start("ponder", predicted.position, self._ponder, predicted)
+
+    def cancel(self):
+        """Stop the running search, if any, and drop its result."""
+        if self._job is not None:
+            self.abort.value = 1
+            self._job.thread.join()
+            self._job = None
+        self.abort.value = 0
+
+    def close(self):
+        self.cancel()
+        if hasattr(self.agent, "close"):
+            self.agent.close()
+
+    def _start(self, kind, key, target, board):
+        job = _Job(kind, key)
+        job.thread = threading.Thread(target=self._run, args=(job, target, board), daemon=True)
+        self._job = job
+        job.thread.start()
+
+    def _collect(self):
+        job = self._job
+        job.thread.join()
+        self._job = None
+        self.abort.value = 0
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    @staticmethod
+    def _run(job, target, board):
+        try:
+            job.result = target(board)
+        except Exception as exc:
+            job.error = exc
+
+    def _think(self, board):
+        return self.agent.get_move(board)
+
+    def _ponder(self, board):
+        agent = self.agent
+        # Search until stopped; get_move() enforces the budget after a hit.
+        agent.time_limit = None
+        try:
+            move = agent.search(board, agent._resume_chain(board))
+        finally:
+            agent.time_limit = self.time_limit
+        return agent._as_coords(board, move)
@@ -0,0 +1,158 @@
+"""
+In-process batched inference for many concurrent games.
+
+    server = InferenceServer(agent.q_values)        # any batched Q function
+    players = [BatchedQAgent(server, color) for ...]  # one per game / thread
+    ...
+    server.stats()  # latency percentiles and batch fill
+    server.close()
+
+Each request (one state or a small stack) is queued and a single worker
+thread runs the Q function on whatever is pending: it starts a batch with
+the oldest request and closes it when `max_batch` states are gathered or
+`max_wait` seconds have passed since that request arrived. Results are
+scattered back through futures, so callers can block (q_values_blocking) or
+await them from asyncio (q_values_async).
+"""
+import asyncio
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from ai.inference import QPolicy
+from utils.metrics import metrics
+from config import WHITE, STATE_SHAPE, INFERENCE_MAX_BATCH, INFERENCE_MAX_WAIT
+
+
+class _Request:
+    __slots__ = ("states", "future", "time")
+
+    def __init__(self, states):
+        self.states = states
+        self.future = Future()
+        self.time = time.perf_counter()
+
+
+class InferenceServer:
+    def __init__(self, q_values, max_batch=INFERENCE_MAX_BATCH, max_wait=INFERENCE_MAX_WAIT,
+                 history=10000):
+        self.q_values = q_values
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        # Latency of recent requests and size of recent batches, for stats().
+        self._latencies = deque(maxlen=history)
+        self._batch_sizes = deque(maxlen=history)
+        self.requests = 0
+        self.batches = 0
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def submit(self, states):
+        """Future for the Q-values of `states`, shape (n, *STATE_SHAPE) or one state."""
+        states = np.asarray(states)
+        if states.ndim == len(STATE_SHAPE):
+            states = states[np.newaxis]
+        request = _Request(states)
+        self._queue.put(request)
+        return request.future
+
+    def q_values_blocking(self, states):
+        return self.submit(states).result()
+
+    async def q_values_async(self, states):
+        return await asyncio.wrap_future(self.submit(states))
+
+    def _gather(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch, rows = [first], len(first.states)
+        deadline = first.time + self.max_wait
+        while rows < self.max_batch:
+            timeout = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # Finish this batch; stop on the next call.
+                self._queue.put(None)
+                break
+            batch.append(request)
+            rows += len(request.states)
+        return batch
+
+    def _serve(self):
+        while True:
+            batch = self._gather()
+            if batch is None:
+                return
+            try:
+                q = np.asarray(self.q_values(np.concatenate([r.states for r in batch])))
+            except Exception as exc:
+                for request in batch:
+                    request.future.set_exception(exc)
+                continue
+            done = time.perf_counter()
+            start = 0
+            for request in batch:
+                end = start + len(request.states)
+                request.future.set_result(q[start:end])
+                self._latencies.append(done - request.time)
+                start = end
+            self.requests += len(batch)
+            self.batches += 1
+            self._batch_sizes.append(start)
+            metrics.count("inference.states", start)
+            metrics.count("inference.batches")
+
+    def stats(self):
+        """Request latency percentiles (ms) and batch fill over the recent history."""
+        latencies = np.array(self._latencies) * 1000
+        sizes = np.array(self._batch_sizes)
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch": float(sizes.mean()) if len(sizes) else None,
+            # A request with several states can take a batch past max_batch.
+            "batch_fill": float(np.minimum(sizes, self.max_batch).mean()) / self.max_batch
+                          if len(sizes) else None,
+            "p50_ms": float(np.percentile(latencies, 50)) if len(latencies) else None,
+            "p99_ms": float(np.percentile(latencies, 99)) if len(latencies) else None,
+        }
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BatchedQAgent(QPolicy):
+    """
+    A QPolicy whose Q-values come from a shared InferenceServer, so
+    get_move(board) and act() from many games or threads are batched
+    together. Blocks its caller until the batch it joined has run.
+    """
+    def __init__(self, server, color=WHITE, epsilon=0.0):
+        self.server = server
+        self.color = color
+        self.epsilon = epsilon
+
+    def q_values(self, states):
+        return self.server.q_values_blocking(states)
+
+    def act(self, state, mask=None, explore=True):
+        """Epsilon-greedy action for one state with self.epsilon, as QLearningAgent.act."""
+        masks = None if mask is None else mask[np.newaxis]
+        epsilon = self.epsilon if explore else 0.0
+        return int(self.epsilon_greedy(state[np.newaxis], masks, epsilon)[0])
@@ -0,0 +1,39 @@
+from game.board import ROWCOL
+
+
+class ChainMemory:
+    """
+    Multi-jump bookkeeping for agents that play through get_move(board).
+
+    Game hands the board back to the same side after each hop of a
+    multi-jump, without saying which piece must go on. An agent remembers
+    the position its own capture reached; when it is asked to move in
+    that position again, the capturing piece must keep jumping.
+    """
+    # (Board.position, square) after our last capture.
+    _chain = None
+
+    def reset(self):
+        """Forget a multi-jump left over from the last game."""
+        self._chain = None
+
+    def _resume_chain(self, board):
+        """Square that must keep jumping if `board` continues our own multi-jump."""
+        chain = None
+        if self._chain is not None:
+            position, sq = self._chain
+            if position == board.position and board.piece_jumps(sq):
+                chain = sq
+        self._chain = None
+        return chain
+
+    def _as_coords(self, board, move):
+        """(start_row, start_col, end_row, end_col) for Game, remembering a capture for _resume_chain."""
+        if move is None:
+            return None
+        src, dst, cap = move
+        if cap >= 0:
+            undo = board.apply_move(move)
+            self._chain = (board.position, dst)
+            board.undo_move(undo)
+        return (*ROWCOL[src], *ROWCOL[dst])
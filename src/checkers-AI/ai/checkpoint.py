@@ -0,0 +1,140 @@
+"""
+Full QLearningAgent checkpoints for resuming training exactly.
+
+    path = save_checkpoint(agent)     # data/checkpoints/ckpt-000004
+    restore_checkpoint(agent)         # newest checkpoint, or None if there is none
+
+A checkpoint is a directory with the online and target weights, the
+optimizer's variables, the replay buffer (one .npy per column, see
+ReplayBuffer.save), the loss/epsilon/reward histories, the random states
+and a state.json with epsilon and the counters. It is written under a
+temporary name, synced and renamed into place, so a crash never leaves a
+partial checkpoint behind; only the newest `keep` are kept.
+"""
+import json
+import os
+import pickle
+import random
+import re
+import shutil
+
+import numpy as np
+
+from config import CHECKPOINT_DIR, CHECKPOINT_KEEP
+
+_NAME = re.compile(r"ckpt-(\d+)$")
+
+
+def list_checkpoints(directory=CHECKPOINT_DIR):
+    """Complete checkpoints in `directory`, oldest first."""
+    if not os.path.isdir(directory):
+        return []
+    found = sorted((int(m.group(1)), name) for name in os.listdir(directory)
+                   if (m := _NAME.match(name)))
+    return [os.path.join(directory, name) for _, name in found]
+
+
+def latest_checkpoint(directory=CHECKPOINT_DIR):
+    checkpoints = list_checkpoints(directory)
+    return checkpoints[-1] if checkpoints else None
+
+
+def _fsync(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def save_checkpoint(agent, directory=CHECKPOINT_DIR, keep=CHECKPOINT_KEEP):
+    """Write a new checkpoint of `agent`, drop all but the newest `keep`, and return its path."""
+    os.makedirs(directory, exist_ok=True)
+    latest = latest_checkpoint(directory)
+    index = int(_NAME.search(latest).group(1)) + 1 if latest else 1
+    final = os.path.join(directory, f"ckpt-{index:06d}")
+    tmp = final + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    optimizer = agent.model.optimizer
+    if not optimizer.built:
+        # So every checkpoint has the full set of slots, trained or not.
+        optimizer.build(agent.model.trainable_variables)
+    agent.model.save_weights(os.path.join(tmp, "model.weights.h5"))
+    agent.target_model.save_weights(os.path.join(tmp, "target.weights.h5"))
+    np.savez(os.path.join(tmp, "optimizer.npz"), *[v.numpy() for v in optimizer.variables])
+    np.savez(os.path.join(tmp, "history.npz"),
+             loss=np.asarray(agent.loss_history, dtype=np.float64),
+             epsilon=np.asarray(agent.epsilon_history, dtype=np.float64),
+             reward=np.asarray(agent.total_rewards, dtype=np.float64))
+    replay = agent.memory.save(os.path.join(tmp, "replay"))
+    with open(os.path.join(tmp, "random.pkl"), "wb") as f:
+        pickle.dump({"numpy": np.random.get_state(), "python": random.getstate()}, f)
+    state = {
+        "state_shape": list(agent.state_shape),
+        "action_size": agent.action_size,
+        "epsilon": agent.epsilon,
+        "episode_count": agent.episode_count,
+        "train_steps": agent.train_steps,
+        "update_credit": agent._update_credit,
+        "replay_type": type(agent.memory).__name__,
+        "replay": replay,
+    }
+    with open(os.path.join(tmp, "state.json"), "w") as f:
+        json.dump(state, f, indent=2)
+
+    for root, _, files in os.walk(tmp):
+        for name in files:
+            _fsync(os.path.join(root, name))
+        _fsync(root)
+    os.replace(tmp, final)
+    _fsync(directory)
+
+    for old in list_checkpoints(directory)[:-keep] if keep else []:
+        shutil.rmtree(old, ignore_errors=True)
+    return final
+
+
+def restore_checkpoint(agent, path=None, directory=CHECKPOINT_DIR):
+    """
+    Load a checkpoint (the newest in `directory` by default) into `agent`,
+    which must have the same network shape and replay buffer type and
+    capacity. Returns the path, or None when there is nothing to load.
+    """
+    path = path or latest_checkpoint(directory)
+    if path is None:
+        return None
+    with open(os.path.join(path, "state.json")) as f:
+        state = json.load(f)
+    if tuple(state["state_shape"]) != tuple(agent.state_shape) or state["action_size"] != agent.action_size:
+        raise ValueError(f"{path} is for a {state['state_shape']} -> {state['action_size']} network")
+    if state["replay_type"] != type(agent.memory).__name__:
+        raise ValueError(f"{path} holds a {state['replay_type']}, the agent uses {type(agent.memory).__name__}")
+
+    optimizer = agent.model.optimizer
+    if not optimizer.built:
+        optimizer.build(agent.model.trainable_variables)
+    agent.model.load_weights(os.path.join(path, "model.weights.h5"))
+    agent.target_model.load_weights(os.path.join(path, "target.weights.h5"))
+    with np.load(os.path.join(path, "optimizer.npz")) as data:
+        values = [data[f"arr_{i}"] for i in range(len(data.files))]
+    if len(values) != len(optimizer.variables):
+        raise ValueError(f"{path} has {len(values)} optimizer variables, expected {len(optimizer.variables)}")
+    for variable, value in zip(optimizer.variables, values):
+        variable.assign(value)
+
+    agent.memory.restore(os.path.join(path, "replay"), state["replay"])
+    with np.load(os.path.join(path, "history.npz")) as data:
+        agent.loss_history = data["loss"].tolist()
+        agent.epsilon_history = data["epsilon"].tolist()
+        agent.total_rewards = data["reward"].tolist()
+    with open(os.path.join(path, "random.pkl"), "rb") as f:
+        states = pickle.load(f)
+    np.random.set_state(states["numpy"])
+    random.setstate(states["python"])
+    agent.epsilon = state["epsilon"]
+    agent.episode_count = state["episode_count"]
+    agent.train_steps = state["train_steps"]
+    agent._update_credit = state["update_credit"]
+    return path
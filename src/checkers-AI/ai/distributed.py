@@ -0,0 +1,229 @@
+"""
+Actor-learner self-play training on one machine.
+
+    python -m ai.distributed [--actors N] [--updates N] [--save PATH]
+
+Actor processes play headless self-play games (a VectorCheckersEnv each)
+with a NumPy copy of the Q-network and write every transition into a
+SharedReplayBuffer. The learner, a QLearningAgent in the calling
+process, samples that buffer for its compiled DQN updates and publishes
+its weights to a shared block every `publish_every` updates; actors pick
+them up on their next step. Actors are started with the "spawn" method
+and never import TensorFlow.
+"""
+import argparse
+import logging
+import multiprocessing as mp
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from ai.inference import NumpyQAgent, NumpyQNetwork
+from ai.replay import SharedReplayBuffer
+from game.env import VectorCheckersEnv
+from utils.metrics import metrics
+from config import (STATE_SHAPE, ACTION_SIZE, MODEL_PATH, ACTOR_ENVS, ACTOR_EPSILON,
+                    ACTOR_EPSILON_ALPHA, SHARED_REPLAY_SIZE, LEARNER_WARMUP, WEIGHT_PUBLISH_UPDATES)
+
+log = logging.getLogger(__name__)
+
+
+class SharedWeights:
+    """
+    Dense-layer weights ([kernel, bias, ...] as from model.get_weights())
+    in shared memory, with a version number that publish() bumps. Like
+    SharedReplayBuffer: create in the parent, attach(handle) in children.
+    """
+    def __init__(self, shapes, ctx=mp):
+        spec = ([tuple(shape) for shape in shapes], ctx.RawValue("q", 0), ctx.Lock())
+        size = sum(int(np.prod(shape)) for shape in spec[0]) * 4
+        self._owner = True
+        self._map(shared_memory.SharedMemory(create=True, size=size), spec)
+
+    @classmethod
+    def attach(cls, handle):
+        name, spec = handle
+        weights = cls.__new__(cls)
+        weights._owner = False
+        weights._map(shared_memory.SharedMemory(name=name), spec)
+        return weights
+
+    def _map(self, shm, spec):
+        self.shm = shm
+        self._spec = spec
+        self.shapes, self._version, self.lock = spec
+        self.flat = np.ndarray(shm.size // 4, dtype=np.float32, buffer=shm.buf)
+
+    @property
+    def handle(self):
+        return self.shm.name, self._spec
+
+    @property
+    def version(self):
+        return self._version.value
+
+    def publish(self, arrays):
+        with self.lock:
+            offset = 0
+            for array in arrays:
+                self.flat[offset:offset + array.size] = array.ravel()
+                offset += array.size
+            self._version.value += 1
+
+    def read(self):
+        """(version, [(kernel, bias), ...]) copied out under the lock."""
+        with self.lock:
+            flat = self.flat.copy()
+            version = self._version.value
+        arrays, offset = [], 0
+        for shape in self.shapes:
+            size = int(np.prod(shape))
+            arrays.append(flat[offset:offset + size].reshape(shape))
+            offset += size
+        return version, list(zip(arrays[::2], arrays[1::2]))
+
+    def close(self):
+        self.flat = None
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+
+def actor_epsilons(actors, base=ACTOR_EPSILON, alpha=ACTOR_EPSILON_ALPHA):
+    """Fixed exploration rate per actor, base ** (1 + alpha * i / (N - 1)) as in Ape-X."""
+    if actors == 1:
+        return [base]
+    return [base ** (1 + alpha * i / (actors - 1)) for i in range(actors)]
+
+
+def _actor(index, replay_handle, weights_handle, steps, games, stop, epsilon, num_envs, seed):
+    replay = SharedReplayBuffer.attach(replay_handle)
+    weights = SharedWeights.attach(weights_handle)
+    rng = np.random.default_rng(seed)
+    env = VectorCheckersEnv(num_envs)
+    policy, version = None, None
+    states = env.reset()
+    masks = env.legal_action_masks()
+    try:
+        while not stop.value:
+            if weights.version != version:
+                version, layers = weights.read()
+                policy = NumpyQAgent(network=NumpyQNetwork(layers=layers))
+            actions = policy.epsilon_greedy(states, masks, epsilon, rng)
+            next_states, rewards, dones, infos = env.step(actions)
+            masks = env.legal_action_masks()
+            finals, final_masks = next_states.copy(), masks.copy()
+            for i, info in enumerate(infos):
+                if "final_state" in info:
+                    finals[i] = info["final_state"]
+                    final_masks[i] = info["final_mask"]
+                    games[index] += 1
+            replay.add_batch(states, actions, rewards, finals, dones, final_masks)
+            steps[index] += num_envs
+            states = next_states
+    finally:
+        replay.close()
+        weights.close()
+
+
+def train(updates, actors=None, agent=None, envs_per_actor=ACTOR_ENVS,
+          replay_size=SHARED_REPLAY_SIZE, warmup=LEARNER_WARMUP,
+          publish_every=WEIGHT_PUBLISH_UPDATES, log_every=10.0, seed=0):
+    """
+    Run `updates` learner updates with `actors` self-play processes
+    (default: one per core, less the learner's). The learner keeps
+    agent.updates_per_step updates per actor step when it can; it never
+    waits for actors when that is None. Returns the trained agent and a
+    stats dict with actor steps/sec and learner updates/sec.
+    """
+    if agent is None:
+        from ai.q_learning import QLearningAgent
+        agent = QLearningAgent(STATE_SHAPE, ACTION_SIZE, prioritized=False)
+    if actors is None:
+        actors = max(1, (os.cpu_count() or 2) - 1)
+    ctx = mp.get_context("spawn")
+    replay = SharedReplayBuffer(replay_size, STATE_SHAPE, seed=seed, ctx=ctx)
+    serial_memory, agent.memory = agent.memory, replay
+    weights = SharedWeights([w.shape for w in agent.model.get_weights()], ctx=ctx)
+    weights.publish(agent.model.get_weights())
+    stop = ctx.RawValue("b", 0)
+    steps = ctx.RawArray("q", actors)
+    games = ctx.RawArray("q", actors)
+    processes = [
+        ctx.Process(target=_actor, daemon=True,
+                    args=(i, replay.handle, weights.handle, steps, games, stop,
+                          epsilon, envs_per_actor, seed + 1 + i))
+        for i, epsilon in enumerate(actor_epsilons(actors))
+    ]
+    ratio = agent.updates_per_step
+    start = time.perf_counter()
+    first_update = agent.train_steps
+    last_log = start
+    try:
+        for process in processes:
+            process.start()
+        while agent.train_steps - first_update < updates:
+            env_steps = sum(steps)
+            if len(replay) < max(warmup, agent.batch_size) or \
+                    (ratio and agent.train_steps - first_update >= env_steps * ratio):
+                if not all(p.is_alive() for p in processes):
+                    raise RuntimeError("an actor process exited")
+                time.sleep(0.001)
+                continue
+            agent.replay()
+            if (agent.train_steps - first_update) % publish_every == 0:
+                weights.publish(agent.model.get_weights())
+            now = time.perf_counter()
+            if now - last_log >= log_every:
+                last_log = now
+                elapsed = now - start
+                log.info("actors %.0f steps/s, learner %.1f updates/s, replay %d, games %d",
+                         env_steps / elapsed, (agent.train_steps - first_update) / elapsed,
+                         len(replay), sum(games))
+    finally:
+        stop.value = 1
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+        agent.memory = serial_memory
+        replay.close()
+        weights.close()
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        "actors": actors,
+        "actor_steps": sum(steps),
+        "actor_steps_per_s": sum(steps) / elapsed,
+        "updates": agent.train_steps - first_update,
+        "updates_per_s": (agent.train_steps - first_update) / elapsed,
+        "games": sum(games),
+        "time": elapsed,
+    }
+    metrics.count("actor.steps", stats["actor_steps"])
+    metrics.count("actor.games", stats["games"])
+    agent.episode_count += stats["games"]
+    return agent, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Actor-learner self-play training.")
+    parser.add_argument("--actors", type=int, help="self-play processes (default: cores - 1)")
+    parser.add_argument("--updates", type=int, default=10000, help="learner updates to run")
+    parser.add_argument("--envs", type=int, default=ACTOR_ENVS, help="games per actor")
+    parser.add_argument("--save", default=MODEL_PATH, help="where to save the trained weights")
+    args = parser.parse_args(argv)
+
+    from utils.loggers import setup_logging
+    setup_logging()
+    agent, stats = train(args.updates, args.actors, envs_per_actor=args.envs)
+    log.info("%d actors: %.0f actor steps/s, %.1f updates/s, %d games in %.1f s",
+             stats["actors"], stats["actor_steps_per_s"], stats["updates_per_s"],
+             stats["games"], stats["time"])
+    agent.save(args.save)
+
+
+if __name__ == "__main__":
+    main()
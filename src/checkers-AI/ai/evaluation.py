@@ -0,0 +1,23 @@
+import json
+import os
+from game.board import EVAL_TERMS
+from config import EVAL_WEIGHTS, EVAL_WEIGHTS_PATH
+
+
+def load_eval_weights(path=EVAL_WEIGHTS_PATH):
+    """
+    Evaluation weights as a tuple in EVAL_TERMS order.
+
+    Entries in the JSON object at `path` override config.EVAL_WEIGHTS; a
+    missing file means the defaults. Weights are rounded to integers so
+    scores stay integral for the null-window search.
+    """
+    weights = dict(EVAL_WEIGHTS)
+    if path and os.path.isfile(path):
+        with open(path) as f:
+            overrides = json.load(f)
+        unknown = set(overrides) - set(EVAL_TERMS)
+        if unknown:
+            raise ValueError(f"Unknown evaluation terms in {path}: {sorted(unknown)}")
+        weights.update(overrides)
+    return tuple(int(round(weights[term])) for term in EVAL_TERMS)
@@ -0,0 +1,127 @@
+"""
+TensorFlow-free inference for trained Q-networks.
+
+export_npz() turns the Keras .weights.h5 that QLearningAgent saves into a
+small .npz of dense-layer weights (this step still needs TensorFlow):
+
+    python -m ai.inference [weights.h5] [model.npz]
+
+NumpyQNetwork runs the same MLP forward pass with NumPy, and NumpyQAgent
+plays with it through the usual get_move(board) interface.
+"""
+import abc
+import os
+import numpy as np
+from ai.chain import ChainMemory
+from game.board import square
+from game.actions import action_to_coords, legal_action_mask
+from utils.helpers import board_to_input
+from config import WHITE, STATE_SHAPE, ACTION_SIZE, MODEL_PATH, NUMPY_MODEL_PATH
+
+
+def export_npz(weights_path=MODEL_PATH, npz_path=NUMPY_MODEL_PATH,
+               state_shape=STATE_SHAPE, action_size=ACTION_SIZE):
+    """Save the Dense layers of a .weights.h5 as kernel_i / bias_i arrays."""
+    from ai.model import build_q_network
+    model = build_q_network(state_shape, action_size)
+    model.load_weights(weights_path)
+    arrays = {}
+    for i, layer in enumerate(l for l in model.layers if l.get_weights()):
+        kernel, bias = layer.get_weights()
+        arrays[f"kernel_{i}"] = kernel.astype(np.float32)
+        arrays[f"bias_{i}"] = bias.astype(np.float32)
+    os.makedirs(os.path.dirname(npz_path) or ".", exist_ok=True)
+    np.savez_compressed(npz_path, **arrays)
+    return npz_path
+
+
+class NumpyQNetwork:
+    """
+    Forward pass of build_q_network's MLP: flatten, ReLU dense layers and a
+    linear output layer. Call with one state or a batch of states.
+    `layers` ([(kernel, bias), ...]) is used instead of loading `path`.
+    """
+    def __init__(self, path=NUMPY_MODEL_PATH, layers=None):
+        if layers is None:
+            with np.load(path) as data:
+                count = len(data.files) // 2
+                layers = [(data[f"kernel_{i}"], data[f"bias_{i}"]) for i in range(count)]
+        self.layers = layers
+        self.input_size = self.layers[0][0].shape[0]
+        self.action_size = self.layers[-1][1].shape[0]
+
+    def __call__(self, states):
+        x = np.asarray(states, dtype=np.float32).reshape(-1, self.input_size)
+        last = len(self.layers) - 1
+        for i, (kernel, bias) in enumerate(self.layers):
+            x = x @ kernel
+            x += bias
+            if i < last:
+                np.maximum(x, 0, out=x)
+        return x
+
+
+class QPolicy(ChainMemory, abc.ABC):
+    """
+    Greedy play from Q-values for Game. Subclasses implement q_values and
+    set self.color.
+    """
+    color = WHITE
+
+    @abc.abstractmethod
+    def q_values(self, states):
+        """Q-values for a batch of board_to_input states, shape (batch, ACTION_SIZE)."""
+
+    def greedy_actions(self, states, masks):
+        """Best legal action for each of a batch of states."""
+        q = np.where(masks, self.q_values(states), -np.inf)
+        return np.argmax(q, axis=1)
+
+    def epsilon_greedy(self, states, masks, epsilon, rng=np.random):
+        """
+        Per state: with probability `epsilon` a uniformly random legal
+        action, else the greedy one; the network runs once for the batch.
+        Rows whose mask is empty (or `masks` None) fall back to all actions.
+        """
+        n = len(states)
+        explore = rng.random(n) < epsilon
+        noise = rng.random((n, ACTION_SIZE))
+        if masks is not None:
+            masks = masks | ~masks.any(axis=1, keepdims=True)
+            noise = np.where(masks, noise, -1.0)
+        actions = np.argmax(noise, axis=1)
+        if not explore.all():
+            q = self.q_values(states[~explore])
+            if masks is not None:
+                q = np.where(masks[~explore], q, -np.inf)
+            actions[~explore] = np.argmax(q, axis=1)
+        return actions
+
+    def greedy_move(self, board, chain=None):
+        """Greedy legal (src, dst, captured) move for self.color, `chain` being the square that must keep jumping."""
+        mask = legal_action_mask(board, self.color, chain)
+        if not mask.any():
+            return None
+        action = self.greedy_actions(board_to_input(board)[np.newaxis], mask[np.newaxis])[0]
+        sr, sc, er, ec = action_to_coords(action)
+        cap = square((sr + er) // 2, (sc + ec) // 2) if abs(er - sr) == 2 else -1
+        return square(sr, sc), square(er, ec), cap
+
+    def get_move(self, board):
+        """Greedy legal move for self.color as (start_row, start_col, end_row, end_col)."""
+        return self._as_coords(board, self.greedy_move(board, self._resume_chain(board)))
+
+
+class NumpyQAgent(QPolicy):
+    """Plays a network exported by export_npz without importing TensorFlow."""
+    def __init__(self, path=NUMPY_MODEL_PATH, color=WHITE, network=None):
+        self.network = network if network is not None else NumpyQNetwork(path)
+        self.color = color
+
+    def q_values(self, states):
+        return self.network(states)
+
+
+if __name__ == "__main__":
+    import sys
+    print(f"Exported {export_npz(*sys.argv[1:3])}")
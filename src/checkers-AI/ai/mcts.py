@@ -0,0 +1,317 @@
+"""
+Monte Carlo tree search with PUCT selection and batched leaf evaluation.
+
+Moves follow the search rules of MinimaxAgent: captures are mandatory and
+each hop of a multi-jump is a ply of its own with the same side to move.
+Every batch descends the tree up to `batch_size` times; a virtual loss on
+the nodes already taken steers the next descent elsewhere, and all the
+new leaves go to the evaluator in one call. Evaluators implement
+
+    evaluate(leaves) -> [(priors, value), ...]
+
+where each leaf is (board, color, moves): priors is a probability per
+move and value is in [-1, 1] for `color`, the side to move. The board is
+only valid during the call.
+"""
+import math
+import random
+import time
+
+import numpy as np
+
+from ai.chain import ChainMemory
+from game.actions import move_to_action
+from utils.helpers import board_to_input
+from utils.metrics import metrics
+from config import (RED, WHITE, MCTS_PLAYOUTS, MCTS_BATCH, MCTS_CPUCT, MCTS_VIRTUAL_LOSS,
+                    MCTS_ROLLOUT_DEPTH)
+
+
+class QNetworkEvaluator:
+    """
+    Leaf evaluation with a Q-network: `q_values` is any batched
+    states -> (batch, ACTION_SIZE) function, e.g. QPolicy.q_values of a
+    QLearningAgent or NumpyQAgent. Priors are a softmax of the legal
+    moves' Q-values at `temperature`, and the value is the best legal
+    Q-value squashed by tanh(q / value_scale).
+    """
+    def __init__(self, q_values, temperature=1.0, value_scale=10.0):
+        self.q_values = q_values
+        self.temperature = temperature
+        self.value_scale = value_scale
+
+    def evaluate(self, leaves):
+        q = np.asarray(self.q_values(np.stack([board_to_input(board) for board, _, _ in leaves])))
+        results = []
+        for row, (_, _, moves) in zip(q, leaves):
+            legal = row[[move_to_action(move) for move in moves]]
+            logits = (legal - legal.max()) / self.temperature
+            priors = np.exp(logits)
+            results.append((priors / priors.sum(), math.tanh(float(legal.max()) / self.value_scale)))
+        return results
+
+
+class RolloutEvaluator:
+    """
+    Uniform priors and a value from one random playout of at most `depth`
+    plies (captures first, as in the search), scored by the result or, if
+    the game goes on, by tanh of the material balance (a king counts 1.5).
+    """
+    def __init__(self, depth=MCTS_ROLLOUT_DEPTH, seed=None):
+        self.depth = depth
+        self.rng = random.Random(seed)
+
+    def evaluate(self, leaves):
+        return [(np.full(len(moves), 1.0 / len(moves)), self.rollout(board, color))
+                for board, color, moves in leaves]
+
+    def rollout(self, board, color):
+        undos = []
+        turn, chain = color, None
+        for _ in range(self.depth):
+            if chain is not None:
+                moves = board.piece_jumps(chain)
+            else:
+                moves = board.get_jumps(turn) or board.get_steps(turn)
+            if not moves:
+                break
+            move = self.rng.choice(moves)
+            undos.append(board.apply_move(move))
+            if move[2] >= 0 and board.piece_jumps(move[1]):
+                chain = move[1]
+            else:
+                chain = None
+                turn = RED if turn == WHITE else WHITE
+        winner = board.winner()
+        if winner is not None:
+            value = 1.0 if winner == color else -1.0
+        elif not undos or chain is None and not (board.get_jumps(turn) or board.get_steps(turn)):
+            value = -1.0 if turn == color else 1.0
+        else:
+            white = board.white_left + 0.5 * board.white_kings
+            red = board.red_left + 0.5 * board.red_kings
+            value = math.tanh((white - red) / 3.0)
+            if color == RED:
+                value = -value
+        for undo in reversed(undos):
+            board.undo_move(undo)
+        return value
+
+
+class Node:
+    __slots__ = ("color", "chain", "prior", "visits", "value_sum", "children", "key", "pending")
+
+    def __init__(self, color, chain, prior):
+        # Side to move here and, mid multi-jump, the square that must jump on.
+        self.color = color
+        self.chain = chain
+        self.prior = prior
+        self.visits = 0
+        # Sum of values for the side that moved into this node.
+        self.value_sum = 0.0
+        # None until expanded; [] for a finished game.
+        self.children = None
+        # (Board.position, color, chain) once expanded, for tree reuse.
+        self.key = None
+        self.pending = False
+
+
+class MCTSAgent(ChainMemory):
+    """
+    PUCT search for Game: get_move(board) searches for `playouts` leaf
+    evaluations or `time_limit` seconds, whichever ends first, and plays
+    the most visited move. With `reuse`, the subtree under the move played
+    is kept and picked up again when the next position is in it. An
+    `abort` flag (anything with .value) stops the search early, as for
+    MinimaxAgent, so BackgroundAgent can run and ponder with it.
+    """
+    def __init__(self, color=WHITE, evaluator=None, playouts=MCTS_PLAYOUTS, time_limit=None,
+                 batch_size=MCTS_BATCH, c_puct=MCTS_CPUCT, virtual_loss=MCTS_VIRTUAL_LOSS,
+                 reuse=True):
+        self.color = color
+        self.evaluator = evaluator if evaluator is not None else RolloutEvaluator()
+        self.playouts = playouts
+        self.time_limit = time_limit
+        self.batch_size = batch_size
+        self.c_puct = c_puct
+        self.virtual_loss = virtual_loss
+        self.reuse = reuse
+        self.abort = None
+        self.stats = {}
+        self._tree = None
+
+    def get_move(self, board):
+        if board.winner() is not None:
+            return None
+        return self._as_coords(board, self.search(board, self._resume_chain(board)))
+
+    def reset(self):
+        """Forget the last game's tree and multi-jump state."""
+        self._tree = None
+        super().reset()
+
+    def search(self, board, chain=None):
+        """Best (src, dst, captured) move for self.color, or None if there is none."""
+        start = time.perf_counter()
+        deadline = start + self.time_limit if self.time_limit else None
+        root = self._find(board, chain)
+        reused = root.visits
+        root.pending = False
+        batches = evaluated = collisions = 0
+        if root.children is None:
+            evaluated += self._run_batch(board, root, 1)[0]
+        while root.children and evaluated < self.playouts:
+            if (deadline and time.perf_counter() >= deadline) or (self.abort is not None and self.abort.value):
+                break
+            count, clashes = self._run_batch(board, root, min(self.batch_size, self.playouts - evaluated))
+            evaluated += count
+            collisions += clashes
+            batches += 1
+
+        best = max(root.children, key=lambda child: child[1].visits, default=None)
+        elapsed = time.perf_counter() - start
+        self.stats = {
+            "playouts": evaluated,
+            "reused": reused,
+            "visits": root.visits,
+            "batches": batches,
+            "batch_fill": evaluated / (batches * self.batch_size) if batches else None,
+            "collisions": collisions,
+            "value": best[1].value_sum / best[1].visits if best and best[1].visits else None,
+            "time": elapsed,
+            "pv": self.principal_variation(root),
+        }
+        metrics.count("mcts.playouts", evaluated)
+        metrics.observe("mcts.time", elapsed)
+        if best is None:
+            self._tree = None
+            return None
+        self._tree = best[1] if self.reuse else None
+        return best[0]
+
+    def principal_variation(self, root, max_len=32):
+        pv, node = [], root
+        while node.children and len(pv) < max_len:
+            move, node = max(node.children, key=lambda child: child[1].visits)
+            if not node.visits:
+                break
+            pv.append(move)
+        return pv
+
+    def _find(self, board, chain):
+        """The kept subtree's node for this position, or a fresh root."""
+        key = (board.position, self.color, chain)
+        frontier = [self._tree] if self._tree is not None else []
+        # Our last move, the opponent's reply and any continuation hops.
+        for _ in range(4):
+            for node in frontier:
+                if node.key == key:
+                    return node
+            frontier = [child for node in frontier if node.children for _, child in node.children]
+        return Node(self.color, chain, 1.0)
+
+    def _moves(self, board, color, chain):
+        if chain is not None:
+            return board.piece_jumps(chain)
+        return board.get_jumps(color) or board.get_steps(color)
+
+    def _select(self, node):
+        """Child with the highest PUCT score."""
+        scale = self.c_puct * math.sqrt(node.visits)
+        best, best_score = None, -math.inf
+        for child in node.children:
+            n = child[1]
+            q = n.value_sum / n.visits if n.visits else 0.0
+            score = q + scale * n.prior / (1 + n.visits)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+    def _run_batch(self, board, root, size):
+        """
+        Collect up to `size` new leaves, evaluate them in one call and back
+        the values up. Returns (playouts, collisions); a descent that ends
+        in a finished game counts as a playout without evaluation.
+        """
+        loss = self.virtual_loss
+        leaves = []
+        finished = collisions = 0
+        for _ in range(size):
+            path, undos, node = [root], [], root
+            while node.children:
+                move, node = self._select(node)
+                undos.append(board.apply_move(move))
+                path.append(node)
+                node.visits += loss
+                node.value_sum -= loss
+
+            if node.children is None and node.pending:
+                # Already waiting in this batch: back out and evaluate what we have.
+                self._backup(path, 0.0, node.color, loss, count=False)
+                collisions += 1
+                for undo in reversed(undos):
+                    board.undo_move(undo)
+                break
+
+            if node.children is None:
+                moves = self._moves(board, node.color, node.chain)
+                winner = board.winner()
+                if winner is not None or not moves:
+                    node.children = []
+                    node.key = (board.position, node.color, node.chain)
+                else:
+                    node.pending = True
+                    node.key = (board.position, node.color, node.chain)
+                    specs = self._child_specs(board, node.color, moves)
+                    leaves.append((node, path, specs, (board.copy(), node.color, moves)))
+
+            if node.children == []:
+                winner = board.winner()
+                value = -1.0 if winner is None or winner != node.color else 1.0
+                self._backup(path, value, node.color, loss)
+                finished += 1
+
+            for undo in reversed(undos):
+                board.undo_move(undo)
+
+        if leaves:
+            results = self.evaluator.evaluate([leaf[3] for leaf in leaves])
+            for (node, path, specs, (_, _, moves)), (priors, value) in zip(leaves, results):
+                node.children = [(move, Node(color, chain, float(p)))
+                                 for move, (color, chain), p in zip(moves, specs, priors)]
+                node.pending = False
+                self._backup(path, value, node.color, loss)
+        return len(leaves) + finished, collisions
+
+    @staticmethod
+    def _child_specs(board, color, moves):
+        """(side to move, chain square) after each move."""
+        opponent = RED if color == WHITE else WHITE
+        specs = []
+        for move in moves:
+            if move[2] >= 0:
+                undo = board.apply_move(move)
+                more = board.piece_jumps(move[1])
+                board.undo_move(undo)
+                if more:
+                    specs.append((color, move[1]))
+                    continue
+            specs.append((opponent, None))
+        return specs
+
+    def _backup(self, path, value, color, loss, count=True):
+        """
+        Remove the virtual loss along `path` and add `value` (for `color`,
+        the side to move at the leaf) to every node from its mover's side.
+        """
+        root = path[0]
+        if count:
+            root.visits += 1
+        parent = root
+        for node in path[1:]:
+            node.visits -= loss
+            node.value_sum += loss
+            if count:
+                node.visits += 1
+                node.value_sum += value if parent.color == color else -value
+            parent = node
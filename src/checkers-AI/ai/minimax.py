@@ -1,73 +1,360 @@
-import math
-from game.board import Board
-from config import RED, WHITE
+import time
+from game.board import SQUARES, EVAL_TERMS, TERM_BITS, TERM_BIAS, TERM_MASK, TERM_HALF
+from ai.chain import ChainMemory
+from ai.transposition import TranspositionTable, EXACT, LOWER, UPPER
+from ai.evaluation import load_eval_weights
+from utils.metrics import metrics
+from config import RED, WHITE, TT_SIZE_MB, ASPIRATION_WINDOW, SEARCH_WORKERS, QUIESCENCE_DEPTH
 
-class MinimaxAgent:
-    def __init__(self, depth=4, color=WHITE):
+# Score for a side left without a legal move, and a bound above any score.
+WIN = 100000
+INF = 10 * WIN
+MAX_PLY = 128
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time or node budget runs out."""
+
+
+class MinimaxAgent(ChainMemory):
+    """
+    Iterative-deepening negamax with alpha-beta, principal-variation search
+    and aspiration windows.
+
+    `depth` is the deepest iteration. With `time_limit` (seconds) or
+    `node_limit` the search stops early and plays the best move of the last
+    completed depth. With `workers` > 1 the search runs Lazy-SMP: helper
+    processes search the same root and share the transposition table.
+    Leaves are resolved by a capture-only quiescence search of at most
+    `quiescence_depth` capture turns (0 turns it off). `weights` defaults
+    to load_eval_weights().
+    """
+    def __init__(self, depth=4, color=WHITE, time_limit=None, node_limit=None,
+                 tt_size_mb=TT_SIZE_MB, aspiration=ASPIRATION_WINDOW,
+                 workers=SEARCH_WORKERS, quiescence_depth=QUIESCENCE_DEPTH,
+                 weights=None):
         self.depth = depth
         self.color = color
+        self.opponent = RED if color == WHITE else WHITE
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.aspiration = aspiration
+        self.quiescence_depth = quiescence_depth
+        self.weights = tuple(weights) if weights is not None else load_eval_weights()
+        if len(self.weights) != len(EVAL_TERMS):
+            raise ValueError(f"Expected {len(EVAL_TERMS)} weights ({', '.join(EVAL_TERMS)}), got {len(self.weights)}")
+        # (weight, shift) per packed field, and the bias the fields carry.
+        self._terms = tuple((w, TERM_BITS * i) for i, w in enumerate(self.weights))
+        self._term_offset = TERM_HALF * sum(self.weights)
+        self.workers = workers
+        self._smp = None
+        if workers > 1:
+            from ai.parallel import LazySMP
+            self._smp = LazySMP(self, tt_size_mb)
+            self.tt = self._smp.tt
+        else:
+            self.tt = TranspositionTable(tt_size_mb)
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [0] * (SQUARES * SQUARES)
+        self.nodes = 0
+        # Beta cutoffs, and how many of them came from the first move tried.
+        self.cutoffs = 0
+        self.first_cutoffs = 0
+        self.stats = {}
+        self._deadline = None
+        self._stoppable = False
+        # Shared flag (anything with .value) that aborts the search when set.
+        self.abort = None
 
     def evaluate(self, board):
-        white = sum(1 for _ in board.get_all_pieces(WHITE))
-        red = sum(1 for _ in board.get_all_pieces(RED))
-        return white - red if self.color == WHITE else red - white
+        """Weighted sum of the board's incrementally kept terms (white minus red)."""
+        t = board.packed_terms + TERM_BIAS
+        mask = TERM_MASK
+        score = -self._term_offset
+        for w, shift in self._terms:
+            score += w * (t >> shift & mask)
+        return score if self.color == WHITE else -score
 
     def get_move(self, board):
-        
         if board.winner() is not None:
             return None
-            
-        _, move = self.minimax(board, self.depth, -math.inf, math.inf, True)
-        return move
-
-    def minimax(self, board, depth, alpha, beta, maximizing_player):
-        if depth == 0 or board.winner():
-            return self.evaluate(board), None
-
-        best_move = None
-        if maximizing_player:
-            max_eval = -math.inf
-            for move in self.get_all_possible_moves(board, self.color):
-                eval, _ = self.minimax(move[1], depth-1, alpha, beta, False)
-                if eval > max_eval:
-                    max_eval = eval
-                    best_move = move[0]
-                alpha = max(alpha, eval)
-                if beta <= alpha:
-                    break
-            return max_eval, best_move
+        return self._as_coords(board, self.search(board, self._resume_chain(board)))
+
+    def reset(self):
+        """Forget the last game: transposition table, move-ordering history and multi-jump state."""
+        self.tt.clear()
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [0] * (SQUARES * SQUARES)
+        super().reset()
+
+    def close(self):
+        """Stop Lazy-SMP helper processes and free the shared table."""
+        if self._smp is not None:
+            self._smp.close()
+            self._smp = None
+
+    def search(self, board, chain=None, first_depth=1, tt_age=None):
+        """Deepen one ply at a time and return the best (src, dst, captured) move found."""
+        start = time.perf_counter()
+        self._deadline = start + self.time_limit if self.time_limit else None
+        self._stoppable = False
+        self.nodes = 0
+        self.cutoffs = self.first_cutoffs = 0
+        self.tt.new_search(tt_age)
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [h >> 1 for h in self.history]
+        helpers = self._smp.start(board, chain) if self._smp else None
+
+        best_move, score, iterations = None, 0, []
+        snapshot = board.snapshot()
+        for depth in range(first_depth, self.depth + 1):
+            try:
+                score, move = self._aspiration(board, depth, score, chain)
+            except SearchTimeout:
+                # The search unwound without undoing its moves.
+                board.restore(snapshot)
+                break
+            best_move = move
+            iterations.append({"depth": depth, "score": score, "nodes": self.nodes,
+                               "cutoffs": self.cutoffs, "time": time.perf_counter() - start})
+            self._stoppable = True
+            if move is None or abs(score) >= WIN:
+                break
+            # A deeper iteration takes several times longer than this one,
+            # so don't start it when it can't finish inside the budget.
+            if self._deadline and time.perf_counter() - start > self.time_limit / 2:
+                break
+
+        self.stats = {
+            "nodes": self.nodes,
+            "depth": iterations[-1]["depth"] if iterations else 0,
+            "score": score,
+            "time": time.perf_counter() - start,
+            "pv": self.principal_variation(board, chain),
+            "iterations": iterations,
+            "cutoffs": self.cutoffs,
+            "first_cutoff_rate": self.first_cutoffs / self.cutoffs if self.cutoffs else None,
+            "tt": self.tt.stats(),
+        }
+        if helpers is not None:
+            self.stats["helper_nodes"] = self._smp.finish(helpers)
+        metrics.count("search.searches")
+        metrics.count("search.nodes", self.nodes)
+        metrics.count("search.cutoffs", self.cutoffs)
+        metrics.count("search.first_cutoffs", self.first_cutoffs)
+        metrics.observe("search.time", self.stats["time"])
+        for it in iterations:
+            metrics.observe(f"search.time_to_d{it['depth']}", it["time"])
+        return best_move
+
+    def _aspiration(self, board, depth, guess, chain):
+        if depth < 3 or not self.aspiration:
+            return self.negamax(board, depth, -INF, INF, self.color, 0, chain)
+        alpha, beta = guess - self.aspiration, guess + self.aspiration
+        while True:
+            score, move = self.negamax(board, depth, alpha, beta, self.color, 0, chain)
+            if score <= alpha:
+                alpha = -INF
+            elif score >= beta:
+                beta = INF
+            else:
+                return score, move
+
+    def _check_budget(self):
+        if (self._deadline and time.perf_counter() >= self._deadline) or \
+                (self.node_limit and self.nodes >= self.node_limit) or \
+                (self.abort is not None and self.abort.value):
+            raise SearchTimeout
+
+    def negamax(self, board, depth, alpha, beta, color, ply=0, chain=None):
+        """
+        Alpha-beta over a single mutable board, scored for the side to move.
+        Moves are applied and undone in place; `chain` is the square of a
+        piece that must keep jumping, in which case the same side moves again.
+        """
+        if depth == 0:
+            if self.quiescence_depth > 0:
+                return self.quiesce(board, alpha, beta, color, self.quiescence_depth, chain), None
+            score = self.evaluate(board)
+            return (score if color == self.color else -score), None
+        self.nodes += 1
+        if self._stoppable and not self.nodes & 1023:
+            self._check_budget()
+        if board.winner():
+            score = self.evaluate(board)
+            return (score if color == self.color else -score), None
+
+        key = None
+        tt_move = None
+        if chain is None:
+            key = board.key(color)
+            entry = self.tt.probe(key)
+            if entry is not None:
+                tt_depth, score, flag, tt_move = entry
+                if tt_depth >= depth and ply:
+                    if flag == EXACT:
+                        return score, tt_move
+                    if flag == LOWER:
+                        alpha = max(alpha, score)
+                    else:
+                        beta = min(beta, score)
+                    if beta <= alpha:
+                        return score, tt_move
+
+        if ply == 0 and chain is None:
+            # The root list is the board's cached one, shared with Game;
+            # copy it before ordering in place.
+            moves = list(board.legal_moves(color, forced=True))
         else:
-            min_eval = math.inf
-            opponent_color = RED if self.color == WHITE else WHITE
-            for move in self.get_all_possible_moves(board, opponent_color):
-                eval, _ = self.minimax(move[1], depth-1, alpha, beta, True)
-                if eval < min_eval:
-                    min_eval = eval
-                    best_move = move[0]
-                beta = min(beta, eval)
-                if beta <= alpha:
-                    break
-            return min_eval, best_move
-
-    def get_all_possible_moves(self, board, color):
+            moves = self.get_all_possible_moves(board, color, chain)
+        if not moves:
+            return -WIN, None
+        if len(moves) > 1:
+            self.order_moves(board, moves, ply, tt_move)
+
+        alpha_orig = alpha
+        opponent = RED if color == WHITE else WHITE
+        best_score, best_move = -INF, None
+        for i, move in enumerate(moves):
+            undo = board.apply_move(move)
+            if move[2] >= 0 and board.piece_jumps(move[1]):
+                # Multi-jump: same side moves again, no sign flip.
+                if i:
+                    score, _ = self.negamax(board, depth - 1, alpha, alpha + 1, color, ply + 1, move[1])
+                if not i or alpha < score < beta:
+                    score, _ = self.negamax(board, depth - 1, alpha, beta, color, ply + 1, move[1])
+            else:
+                if i:
+                    score = -self.negamax(board, depth - 1, -alpha - 1, -alpha, opponent, ply + 1)[0]
+                if not i or alpha < score < beta:
+                    score = -self.negamax(board, depth - 1, -beta, -alpha, opponent, ply + 1)[0]
+            board.undo_move(undo)
+
+            if score > best_score:
+                best_score, best_move = score, move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self.cutoffs += 1
+                if not i:
+                    self.first_cutoffs += 1
+                if move[2] < 0 and ply < MAX_PLY:
+                    killers = self.killers[ply]
+                    if killers[0] != move:
+                        killers[1] = killers[0]
+                        killers[0] = move
+                    self.history[move[0] * SQUARES + move[1]] += depth * depth
+                break
+
+        if key is not None:
+            if best_score <= alpha_orig:
+                flag = UPPER
+            elif best_score >= beta:
+                flag = LOWER
+            else:
+                flag = EXACT
+            self.tt.store(key, depth, best_score, flag, best_move)
+        return best_score, best_move
+
+    def quiesce(self, board, alpha, beta, color, depth, chain=None):
+        """
+        Capture-only search below the horizon, scored for the side to move.
+
+        Captures are mandatory, as in get_all_possible_moves, so the side to
+        move stands pat on the static evaluation only when it has no jump,
+        or when `depth` capture turns have been searched. Continuing a
+        multi-jump does not use up `depth`, so chains are always finished.
+        """
+        self.nodes += 1
+        if self._stoppable and not self.nodes & 1023:
+            self._check_budget()
+        score = self.evaluate(board)
+        if color != self.color:
+            score = -score
+        if board.winner():
+            return score
+
+        if chain is None:
+            if depth <= 0:
+                return score
+            jumps = board.get_jumps(color)
+            if not jumps:
+                return score
+        else:
+            jumps = board.piece_jumps(chain)
+        best = -INF
+
+        if len(jumps) > 1:
+            kings = board.king_bb
+            jumps.sort(key=lambda move: kings >> move[2] & 1, reverse=True)
+        opponent = RED if color == WHITE else WHITE
+        for move in jumps:
+            undo = board.apply_move(move)
+            if board.piece_jumps(move[1]):
+                score = self.quiesce(board, alpha, beta, color, depth, move[1])
+            else:
+                score = -self.quiesce(board, -beta, -alpha, opponent, depth - 1)
+            board.undo_move(undo)
+            if score > best:
+                best = score
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+        return best
+
+    def order_moves(self, board, moves, ply, tt_move):
+        """
+        Sort in place: TT / previous-PV move first, then captures (kings
+        before men), then killer moves, then by history score.
+        """
+        killers = self.killers[ply] if ply < MAX_PLY else (None, None)
+        history = self.history
+        kings = board.king_bb
+
+        def rank(move):
+            if move == tt_move:
+                return 1 << 40
+            src, dst, cap = move
+            if cap >= 0:
+                return (1 << 36) + (kings >> cap & 1) * (1 << 32)
+            if move == killers[0]:
+                return 1 << 31
+            if move == killers[1]:
+                return 1 << 30
+            return history[src * SQUARES + dst]
+
+        moves.sort(key=rank, reverse=True)
+
+    def principal_variation(self, board, chain=None, max_len=MAX_PLY):
+        """Follow best moves stored in the transposition table from `board`."""
+        pv = []
+        undos = []
+        color = self.color
+        while chain is None and len(pv) < max_len:
+            entry = self.tt.probe(board.key(color))
+            if entry is None or entry[3] is None:
+                break
+            move = entry[3]
+            if move not in self.get_all_possible_moves(board, color):
+                break
+            pv.append(move)
+            undos.append(board.apply_move(move))
+            # Chain positions are not stored, so the line ends at a multi-jump.
+            if move[2] >= 0 and board.piece_jumps(move[1]):
+                break
+            color = RED if color == WHITE else WHITE
+        for undo in reversed(undos):
+            board.undo_move(undo)
+        return pv
+
+    def get_all_possible_moves(self, board, color, chain=None):
         """
-        Generate (move, new_board) pairs for the given color.
-        If any captures exist, only return capture moves.
+        Generate (src, dst, captured) moves for the given color.
+        If any captures exist, only return capture moves; steps are not
+        generated at all in that case. A piece in the middle of a
+        multi-jump may only continue jumping.
         """
-        captures = []
-        non_caps = []
-    
-        for piece in board.get_all_pieces(color):
-            valid_moves = board.get_valid_moves(piece)
-            for (r, c), skipped in valid_moves.items():
-                new_board = board.copy()
-                temp_piece = new_board.board[piece.row][piece.col]
-                new_board.move(temp_piece, r, c)
-                if skipped:
-                    new_board.remove(skipped)
-                    captures.append(((piece.row, piece.col, r, c), new_board))
-                else:
-                    non_caps.append(((piece.row, piece.col, r, c), new_board))
-    
-        # If any capturing moves, those are mandatory:
-        return captures if captures else non_caps
+        if chain is not None:
+            return board.piece_jumps(chain)
+        return board.get_jumps(color) or board.get_steps(color)
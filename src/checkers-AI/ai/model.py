@@ -10,3 +10,49 @@ def build_q_network(input_shape, output_size):
     ])
     model.compile(optimizer='adam', loss='mse')
     return model
+
+
+def build_q_function(model):
+    """Compiled forward pass: Q-values for a batch of states of any dtype."""
+    @tf.function(reduce_retracing=True)
+    def q_values(states):
+        return model(tf.cast(states, tf.float32), training=False)
+    return q_values
+
+
+def build_train_step(model, target_model, gamma):
+    """
+    One compiled DQN update on `model`. Targets come from `target_model`:
+    reward + gamma * max_a Q_target(next_state, a) over the next state's
+    legal actions `next_masks`, or just the reward when the episode ended
+    (or the next state has no legal action). Only the taken action's
+    Q-value is regressed, with per-sample (importance-sampling) weights.
+    Returns (loss, td_errors).
+    """
+    optimizer = model.optimizer
+
+    @tf.function
+    def train_step(states, actions, rewards, next_states, dones, next_masks, weights):
+        q_next = target_model(tf.cast(next_states, tf.float32), training=False)
+        q_next = tf.reduce_max(tf.where(next_masks, q_next, -float("inf")), axis=1)
+        q_next = tf.where(tf.reduce_any(next_masks, axis=1), q_next, 0.0)
+        not_done = 1.0 - tf.cast(dones, tf.float32)
+        targets = rewards + gamma * not_done * q_next
+        with tf.GradientTape() as tape:
+            q = model(tf.cast(states, tf.float32), training=True)
+            q_taken = tf.gather(q, actions, axis=1, batch_dims=1)
+            td_errors = targets - q_taken
+            loss = tf.reduce_mean(weights * tf.square(td_errors))
+        grads = tape.gradient(loss, model.trainable_variables)
+        optimizer.apply_gradients(zip(grads, model.trainable_variables))
+        return loss, td_errors
+    return train_step
+
+
+def build_target_sync(model, target_model):
+    """Compiled target update: target = tau * online + (1 - tau) * target."""
+    @tf.function
+    def sync(tau):
+        for source, target in zip(model.weights, target_model.weights):
+            target.assign(tau * source + (1.0 - tau) * target)
+    return sync
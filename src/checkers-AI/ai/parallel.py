@@ -0,0 +1,78 @@
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from ai.transposition import TranspositionTable
+from game.board import Board
+
+# Per-process helper agent, created once by the pool initializer.
+_helper = None
+
+
+def _init_helper(shm_name, tt_size_mb, options, abort):
+    global _helper
+    from ai.minimax import MinimaxAgent
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _helper = MinimaxAgent(tt_size_mb=0, workers=1, **options)
+    _helper.tt = TranspositionTable(tt_size_mb, buffer=shm.buf)
+    _helper.abort = abort
+    # Keep the mapping alive for the life of the process.
+    _helper._shm = shm
+
+
+def _helper_search(snapshot, chain, index, tt_age):
+    board = Board.from_snapshot(snapshot)
+    # Odd helpers start one ply deeper so the workers spread across depths
+    # instead of repeating the main search move for move.
+    _helper.search(board, chain, first_depth=1 + index % 2, tt_age=tt_age)
+    return _helper.nodes
+
+
+class LazySMP:
+    """
+    Helper processes for MinimaxAgent's Lazy-SMP mode.
+
+    The transposition table lives in a shared-memory block. Every helper
+    searches the same root against it, so the main search picks up bounds
+    and best moves they have already stored. The main process plays the
+    move; helpers stop through a shared abort flag when it finishes.
+    """
+    def __init__(self, agent, tt_size_mb):
+        self.helpers = agent.workers - 1
+        self.shm = shared_memory.SharedMemory(create=True, size=TranspositionTable.nbytes(tt_size_mb))
+        self.tt = TranspositionTable(tt_size_mb, buffer=self.shm.buf)
+        self.abort = mp.RawValue('b', 0)
+        self.pool = mp.Pool(
+            self.helpers,
+            initializer=_init_helper,
+            initargs=(self.shm.name, tt_size_mb, self.search_options(agent), self.abort),
+        )
+
+    @staticmethod
+    def search_options(agent):
+        """MinimaxAgent settings the helpers must share with the main search."""
+        return {
+            "depth": agent.depth,
+            "color": agent.color,
+            "aspiration": agent.aspiration,
+            "quiescence_depth": agent.quiescence_depth,
+            "weights": agent.weights,
+        }
+
+    def start(self, board, chain):
+        self.abort.value = 0
+        snapshot = board.snapshot()
+        return [
+            self.pool.apply_async(_helper_search, (snapshot, chain, i, self.tt.age))
+            for i in range(self.helpers)
+        ]
+
+    def finish(self, pending):
+        """Stop the helpers and return how many nodes they searched."""
+        self.abort.value = 1
+        return sum(result.get() for result in pending)
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+        self.tt.release()
+        self.shm.close()
+        self.shm.unlink()
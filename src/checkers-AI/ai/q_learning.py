@@ -1,14 +1,27 @@
+import logging
 import random
-from collections import deque
+import time
 import numpy as np
-from ai.model import build_q_network
+from ai.model import build_q_network, build_q_function, build_train_step, build_target_sync
+from ai.replay import ReplayBuffer, PrioritizedReplayBuffer
 import os
 from game.board import *
+from ai.inference import QPolicy
+from utils.metrics import metrics
+from config import (WHITE, PRIORITIZED_REPLAY, PER_ALPHA, PER_BETA,
+                    UPDATES_PER_STEP, TARGET_SYNC_STEPS, TARGET_TAU)
 
-class QLearningAgent:
+log = logging.getLogger(__name__)
+
+class QLearningAgent(QPolicy):
     """
     Q-Learning agent with vectorized experience replay and fixed-size buffer.
-    Trains once per episode to reduce overhead and uses batch updates.
+
+    Every environment step earns `updates_per_step` gradient steps (0.25 =
+    one update every four moves), each a single compiled DQN update against
+    a separate target network. The target is copied from the online
+    network every `target_sync` updates, or, when `tau` is set, moved
+    towards it by Polyak averaging after every update.
     """
     def __init__(self,
                  state_shape,
@@ -18,8 +31,12 @@ class QLearningAgent:
                  epsilon_min=0.01,
                  epsilon_decay=0.995,
                  memory_size=20000,
-                 batch_size=64):
-        print("[DEBUG] Initializing QLearningAgent...")
+                 batch_size=64,
+                 prioritized=PRIORITIZED_REPLAY,
+                 updates_per_step=UPDATES_PER_STEP,
+                 target_sync=TARGET_SYNC_STEPS,
+                 tau=TARGET_TAU):
+        log.debug("Initializing QLearningAgent...")
         self.state_shape = state_shape
         self.action_size = action_size
         self.gamma = gamma
@@ -27,67 +44,107 @@ class QLearningAgent:
         self.epsilon_min = epsilon_min
         self.epsilon_decay = epsilon_decay
         self.batch_size = batch_size
+        self.updates_per_step = updates_per_step
+        self.target_sync = target_sync
+        self.tau = tau
+        self.train_steps = 0
+        self._update_credit = 0.0
+        self.color = WHITE
 
-        self.memory = deque(maxlen=memory_size)
-        print("[DEBUG] Building Q-network...")
+        if prioritized:
+            self.memory = PrioritizedReplayBuffer(memory_size, state_shape, alpha=PER_ALPHA, beta=PER_BETA)
+        else:
+            self.memory = ReplayBuffer(memory_size, state_shape)
+        log.debug("Building Q-network...")
         self.model = build_q_network(self.state_shape, self.action_size)
+        self.target_model = build_q_network(self.state_shape, self.action_size)
+        self.target_model.set_weights(self.model.get_weights())
+        self._q_values = build_q_function(self.model)
+        self._train_step = build_train_step(self.model, self.target_model, self.gamma)
+        self._sync_target = build_target_sync(self.model, self.target_model)
 
         self.total_rewards = []
         self.loss_history = []
         self.epsilon_history = [self.epsilon]
         self.episode_count = 0
-        print("[DEBUG] Agent initialized successfully.")
+        log.debug("Agent initialized successfully.")
+
+    def q_values(self, states):
+        return self._q_values(states).numpy()
 
-    def act(self, state):
-        if np.random.rand() < self.epsilon:
-            action = random.randrange(self.action_size)
-            print(f"[DEBUG] Random action chosen: {action}")
+    def act(self, state, mask=None, explore=True):
+        """
+        Epsilon-greedy action. With a legal-action `mask` both the random and
+        the greedy choice are restricted to legal actions.
+        """
+        if explore and np.random.rand() < self.epsilon:
+            if mask is not None and mask.any():
+                action = int(np.random.choice(np.flatnonzero(mask)))
+            else:
+                action = random.randrange(self.action_size)
+            log.debug("Random action chosen: %d", action)
             return action
-        q_values = self.model.predict(state[np.newaxis, ...], verbose=0)[0]
+        q_values = self._q_values(state[np.newaxis, ...]).numpy()[0]
+        if mask is not None and mask.any():
+            q_values = np.where(mask, q_values, -np.inf)
         action = int(np.argmax(q_values))
-        print(f"[DEBUG] Greedy action chosen: {action}")
+        log.debug("Greedy action chosen: %d", action)
         return action
 
-    def remember(self, state, action, reward, next_state, done):
-        print(f"[DEBUG] Remembering experience. Done: {done}")
-        self.memory.append((state, action, reward, next_state, done))
+    def act_batch(self, states, masks=None):
+        """Epsilon-greedy actions for a stack of states, with one network call."""
+        return self.epsilon_greedy(states, masks, self.epsilon)
+
+    def remember(self, state, action, reward, next_state, done, next_mask):
+        log.debug("Remembering experience. Done: %s", done)
+        self.memory.add(state, action, reward, next_state, done, next_mask)
 
     def replay(self):
         if len(self.memory) < self.batch_size:
-            print(f"[DEBUG] Not enough memory to replay. Memory size: {len(self.memory)}")
+            log.debug("Not enough memory to replay. Memory size: %d", len(self.memory))
             return
 
-        print("[DEBUG] Starting replay training...")
-        batch = random.sample(self.memory, self.batch_size)
-        states = np.array([b[0] for b in batch])
-        actions = np.array([b[1] for b in batch])
-        rewards = np.array([b[2] for b in batch])
-        next_states = np.array([b[3] for b in batch])
-        dones = np.array([b[4] for b in batch])
-
-        q_current = self.model.predict(states, verbose=0)
-        q_next = self.model.predict(next_states, verbose=0)
-
-        q_target = q_current.copy()
-        for i in range(self.batch_size):
-            if dones[i]:
-                q_target[i, actions[i]] = rewards[i]
-            else:
-                q_target[i, actions[i]] = rewards[i] + self.gamma * np.max(q_next[i])
+        start = time.perf_counter()
+        states, actions, rewards, next_states, dones, next_masks, indices, weights = \
+            self.memory.sample(self.batch_size)
+        loss, td_errors = self._train_step(states, actions, rewards, next_states, dones, next_masks,
+                                           weights)
+        if isinstance(self.memory, PrioritizedReplayBuffer):
+            self.memory.update_priorities(indices, td_errors.numpy())
+
+        self.train_steps += 1
+        if self.tau is not None:
+            self._sync_target(self.tau)
+        elif self.train_steps % self.target_sync == 0:
+            self._sync_target(1.0)
 
-        history = self.model.fit(states, q_target, verbose=0)
-        loss = history.history['loss'][0]
+        loss = float(loss)
         self.loss_history.append(loss)
-        print(f"[DEBUG] Training loss: {loss}")
+        # float(loss) waits for the step, so this is the real update time.
+        metrics.observe("train.step", time.perf_counter() - start)
+        metrics.count("train.samples", self.batch_size)
+        return loss
+
+    def learn(self, env_steps=1):
+        """Run the gradient steps earned by `env_steps` environment steps."""
+        self._update_credit += env_steps * self.updates_per_step
+        while self._update_credit >= 1:
+            self._update_credit -= 1
+            self.replay()
 
+    def decay_epsilon(self):
         if self.epsilon > self.epsilon_min:
             self.epsilon *= self.epsilon_decay
             self.epsilon_history.append(self.epsilon)
-            print(f"[DEBUG] Epsilon decayed to: {self.epsilon}")
+            log.debug("Epsilon decayed to: %.4f", self.epsilon)
 
-    def train_episode(self, env):
-        print("[DEBUG] Starting training episode...")
+    def train_episode(self, env, logger=None):
+        """One self-play game; with a utils.loggers.Logger every move is recorded."""
+        log.debug("Starting training episode...")
         state = env.reset()
+        mask = env.legal_action_mask()
+        if logger is not None:
+            logger.new_game()
         total_reward = 0
         done = False
         step_count = 0
@@ -95,29 +152,71 @@ class QLearningAgent:
 
         while not done:
             if step_count >= max_steps:
-                print(f"[DEBUG] Max steps ({max_steps}) reached, ending episode early.")
+                log.debug("Max steps (%d) reached, ending episode early.", max_steps)
                 break
 
-            action = self.act(state)
+            action = self.act(state, mask)
             next_state, reward, done, _ = env.step(action)
-            print(f"[DEBUG] Step {step_count} | Action: {action}, Reward: {reward}, Done: {done}")
-            self.remember(state, action, reward, next_state, done)
+            mask = env.legal_action_mask()
+            log.debug("Step %d | Action: %d, Reward: %s, Done: %s", step_count, action, reward, done)
+            if logger is not None:
+                logger.log(state, action, reward)
+            self.remember(state, action, reward, next_state, done, mask)
             total_reward += reward
             state = next_state
             step_count += 1
+            self.learn()
 
-        self.replay()
+        self.decay_epsilon()
 
         self.total_rewards.append(total_reward)
         self.episode_count += 1
-        print(f"[DEBUG] Episode {self.episode_count} completed. Reward: {total_reward:.2f}, Loss: {self.loss_history[-1]:.4f}, Epsilon: {self.epsilon:.3f}")
+        log.info("Episode %d completed. Reward: %.2f, Loss: %.4f, Epsilon: %.3f", self.episode_count,
+                 total_reward, self.loss_history[-1] if self.loss_history else float("nan"), self.epsilon)
         return total_reward
 
 
+    def train_vectorized(self, vec_env, num_steps, logger=None):
+        """
+        Play vec_env.num_envs games at once for `num_steps` steps, choosing
+        every game's action with a single network call; each game counts as
+        one environment step towards learn(). Returns the total reward of each game that finished.
+        With a utils.loggers.Logger every move is recorded under its own game id.
+        """
+        states = vec_env.reset()
+        masks = vec_env.legal_action_masks()
+        running = np.zeros(vec_env.num_envs)
+        finished = []
+        if logger is not None:
+            games = np.array([logger.new_game() for _ in range(vec_env.num_envs)])
+        for _ in range(num_steps):
+            actions = self.act_batch(states, masks)
+            next_states, rewards, dones, infos = vec_env.step(actions)
+            masks = vec_env.legal_action_masks()
+            running += rewards
+            if logger is not None:
+                logger.log_batch(states, actions, rewards, games)
+            for i, info in enumerate(infos):
+                final_state = info.get("final_state", next_states[i])
+                final_mask = info.get("final_mask", masks[i])
+                self.remember(states[i], actions[i], rewards[i], final_state, dones[i], final_mask)
+                if "final_state" in info:
+                    finished.append(running[i])
+                    running[i] = 0
+                    self.decay_epsilon()
+                    if logger is not None:
+                        games[i] = logger.new_game()
+            states = next_states
+            self.learn(vec_env.num_envs)
+
+        self.total_rewards.extend(finished)
+        self.episode_count += len(finished)
+        return finished
+
     def train(self, env, num_episodes=200):
-        print(f"[DEBUG] Training started for {num_episodes} episodes...")
+        log.info("Training started for %d episodes...", num_episodes)
         for ep in range(num_episodes):
-            print(f"[DEBUG] === Episode {ep+1} ===")
+            log.debug("=== Episode %d ===", ep + 1)
             self.train_episode(env)
 
     def plot_training(self):
@@ -146,7 +245,7 @@ class QLearningAgent:
             plt.tight_layout()
             plt.show()
         except ImportError:
-            print("Matplotlib is required for plotting. Install with 'pip install matplotlib'.")
+            log.warning("Matplotlib is required for plotting. Install with 'pip install matplotlib'.")
 
     def save(self, path):
         """Save model weights and training metadata."""
@@ -156,20 +255,10 @@ class QLearningAgent:
             path = base + ".weights.h5"
 
         self.model.save_weights(path)
-        print(f"Model saved to {path}. Episodes: {self.episode_count}, "
-              f"Memory size: {len(self.memory)}, Final epsilon: {self.epsilon:.3f}")
+        log.info("Model saved to %s. Episodes: %d, Memory size: %d, Final epsilon: %.3f",
+                 path, self.episode_count, len(self.memory), self.epsilon)
 
     def load(self, path):
         self.model.load_weights(path)
-        print(f"[DEBUG] Loaded model weights from {path}.")
-
-    def get_move(self, board):
-        
-        from utils.helpers import state_to_input
-        state = state_to_input(board.board)
-        act = self.act(state)
-        n = ROWS * COLS
-        start_flat, end_flat = divmod(act, n)
-        sr, sc = divmod(start_flat, COLS)
-        er, ec = divmod(end_flat, COLS)
-        return (sr, sc, er, ec)
+        self.target_model.set_weights(self.model.get_weights())
+        log.info("Loaded model weights from %s.", path)
@@ -0,0 +1,99 @@
+"""
+Named agent factories for headless play (arena, servers, benchmarks).
+
+    make_agent("minimax:depth=6,time=0.1", WHITE)
+
+A spec is a registered name optionally followed by `:key=value,...`
+options for its factory. Each factory imports its backend only when it
+is used, so TensorFlow is loaded only for the "q" agent.
+"""
+import ast
+import os
+import numpy as np
+from ai.inference import QPolicy
+from config import (ACTION_SIZE, STATE_SHAPE, DEPTH_LIMIT, MAX_DEPTH,
+                    MODEL_PATH, NUMPY_MODEL_PATH, MCTS_PLAYOUTS)
+
+
+class RandomAgent(QPolicy):
+    """Uniformly random legal moves; a baseline for the arena."""
+    def __init__(self, color, seed=None):
+        self.color = color
+        self.rng = np.random.default_rng(seed)
+
+    def q_values(self, states):
+        return self.rng.random((len(states), ACTION_SIZE))
+
+
+def minimax_agent(color, depth=None, time=None, nodes=None, weights=None, **options):
+    """`time` is seconds per move; depth defaults to MAX_DEPTH under a time limit, else DEPTH_LIMIT."""
+    from ai.minimax import MinimaxAgent
+    if isinstance(weights, str):
+        from ai.evaluation import load_eval_weights
+        weights = load_eval_weights(weights)
+    if depth is None:
+        depth = MAX_DEPTH if time else DEPTH_LIMIT
+    options.setdefault("workers", 1)
+    return MinimaxAgent(depth=depth, color=color, time_limit=time, node_limit=nodes,
+                        weights=weights, **options)
+
+
+def q_learning_agent(color, path=MODEL_PATH):
+    from ai.q_learning import QLearningAgent
+    agent = QLearningAgent(state_shape=STATE_SHAPE, action_size=ACTION_SIZE)
+    agent.color = color
+    if os.path.isfile(path):
+        agent.load(path)
+    return agent
+
+
+def numpy_q_agent(color, path=NUMPY_MODEL_PATH):
+    from ai.inference import NumpyQAgent
+    return NumpyQAgent(path, color=color)
+
+
+def mcts_agent(color, playouts=MCTS_PLAYOUTS, time=None, eval="rollout", path=None, **options):
+    """`eval` is "rollout", "numpy_q" or "q"; `path` overrides the network file."""
+    from ai.mcts import MCTSAgent, QNetworkEvaluator, RolloutEvaluator
+    if eval == "rollout":
+        evaluator = RolloutEvaluator()
+    elif eval == "numpy_q":
+        evaluator = QNetworkEvaluator(numpy_q_agent(color, path or NUMPY_MODEL_PATH).q_values)
+    elif eval == "q":
+        evaluator = QNetworkEvaluator(q_learning_agent(color, path or MODEL_PATH).q_values)
+    else:
+        raise ValueError(f"Unknown MCTS evaluator {eval!r}")
+    return MCTSAgent(color, evaluator, playouts=playouts, time_limit=time, **options)
+
+
+def random_agent(color, seed=None):
+    return RandomAgent(color, seed)
+
+
+AGENTS = {
+    "minimax": minimax_agent,
+    "q": q_learning_agent,
+    "numpy_q": numpy_q_agent,
+    "mcts": mcts_agent,
+    "random": random_agent,
+}
+
+
+def parse_spec(spec):
+    """'name:key=value,...' -> (name, options); values are Python literals or plain strings."""
+    name, _, rest = spec.partition(":")
+    if name not in AGENTS:
+        raise ValueError(f"Unknown agent {name!r}; choose from {', '.join(AGENTS)}")
+    options = {}
+    for item in filter(None, rest.split(",")):
+        key, _, value = item.partition("=")
+        try:
+            options[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            options[key] = value
+    return name, options
+
+
+def make_agent(spec, color):
+    name, options = parse_spec(spec)
+    return AGENTS[name](color, **options)
@@ -0,0 +1,309 @@
+import multiprocessing as mp
+import os
+from multiprocessing import shared_memory
+import numpy as np
+from config import ACTION_SIZE
+
+
+class ReplayBuffer:
+    """
+    Fixed-capacity experience replay kept in preallocated NumPy arrays.
+
+    Transitions are written into a ring, overwriting the oldest once full,
+    and batches are gathered with fancy indexing, so there is no per-sample
+    Python object. States are stored as `state_dtype` (int8 fits
+    board_to_input). Each transition also keeps the legal-action mask of
+    its next state, bit-packed, so the learner can bootstrap from legal
+    actions only. sample() returns the same tuple as
+    PrioritizedReplayBuffer.sample() with uniform weights.
+    """
+    COLUMNS = ("states", "actions", "rewards", "next_states", "dones", "next_masks")
+    # restore() may keep a full buffer as copy-on-write memmaps of the files.
+    _mmap_restore = True
+
+    def __init__(self, capacity, state_shape, state_dtype=np.int8, seed=None, action_size=ACTION_SIZE):
+        self.capacity = int(capacity)
+        self.action_size = action_size
+        self.states = np.zeros((self.capacity, *state_shape), dtype=state_dtype)
+        self.next_states = np.zeros((self.capacity, *state_shape), dtype=state_dtype)
+        self.actions = np.zeros(self.capacity, dtype=np.int32)
+        self.rewards = np.zeros(self.capacity, dtype=np.float32)
+        self.dones = np.zeros(self.capacity, dtype=bool)
+        self.next_masks = np.zeros((self.capacity, (action_size + 7) // 8), dtype=np.uint8)
+        self.pos = 0
+        self.size = 0
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state, done, next_mask):
+        i = self.pos
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.next_masks[i] = np.packbits(next_mask)
+        self._advance(1)
+        return i
+
+    def add_batch(self, states, actions, rewards, next_states, dones, next_masks):
+        """Insert several transitions at once; returns their slot indices."""
+        idx = (self.pos + np.arange(len(actions))) % self.capacity
+        self.states[idx] = states
+        self.actions[idx] = actions
+        self.rewards[idx] = rewards
+        self.next_states[idx] = next_states
+        self.dones[idx] = dones
+        self.next_masks[idx] = np.packbits(next_masks, axis=1)
+        self._advance(len(idx))
+        return idx
+
+    def _advance(self, n):
+        self.pos = (self.pos + n) % self.capacity
+        self.size = min(self.size + n, self.capacity)
+
+    def gather(self, idx):
+        next_masks = np.unpackbits(self.next_masks[idx], axis=1, count=self.action_size).view(bool)
+        return (self.states[idx], self.actions[idx], self.rewards[idx],
+                self.next_states[idx], self.dones[idx], next_masks)
+
+    def sample(self, batch_size):
+        """(states, actions, rewards, next_states, dones, next_masks, indices, weights)."""
+        idx = self.rng.integers(0, self.size, size=batch_size)
+        return (*self.gather(idx), idx, np.ones(batch_size, dtype=np.float32))
+
+    def update_priorities(self, indices, errors):
+        """Uniform replay ignores priorities; kept so callers need not check."""
+
+    def save(self, folder):
+        """
+        Write the filled part of each column to folder/<column>.npy and
+        return the small rest of the state for restore().
+        """
+        os.makedirs(folder, exist_ok=True)
+        for name in self.COLUMNS:
+            np.save(os.path.join(folder, name + ".npy"), getattr(self, name)[:self.size])
+        return {"pos": int(self.pos), "size": int(self.size), "capacity": self.capacity,
+                "rng": self.rng.bit_generator.state}
+
+    def restore(self, folder, state):
+        """
+        Load what save() wrote. A full buffer is memory-mapped copy-on-write,
+        so restoring costs no reads up front and never modifies the files;
+        a partly filled one is copied into the existing arrays.
+        """
+        if state["capacity"] != self.capacity:
+            raise ValueError(f"checkpoint replay holds {state['capacity']} transitions, "
+                             f"this buffer {self.capacity}")
+        size = state["size"]
+        for name in self.COLUMNS:
+            column = np.load(os.path.join(folder, name + ".npy"), mmap_mode="c")
+            current = getattr(self, name)
+            if column.shape[1:] != current.shape[1:] or column.dtype != current.dtype:
+                raise ValueError(f"checkpoint replay column {name!r} is {column.dtype}{column.shape}, "
+                                 f"expected {current.dtype}{current.shape}")
+            if size == self.capacity and self._mmap_restore:
+                setattr(self, name, column)
+            else:
+                current[:size] = column
+        self.pos, self.size = state["pos"], size
+        self.rng.bit_generator.state = state["rng"]
+
+
+class SumTree:
+    """
+    Binary tree over `capacity` leaf priorities where every node holds the
+    sum of its children. Updates and prefix-sum searches are O(log n) and
+    both work on whole arrays of leaves at once.
+    """
+    def __init__(self, capacity):
+        self.leaves = 1
+        while self.leaves < capacity:
+            self.leaves *= 2
+        # Node 1 is the root; leaf i is node leaves + i.
+        self.tree = np.zeros(2 * self.leaves, dtype=np.float64)
+        # Row n is (left child, right child) of node n.
+        self.children = self.tree.reshape(-1, 2)
+
+    @property
+    def total(self):
+        return self.tree[1]
+
+    def __getitem__(self, idx):
+        return self.tree[np.asarray(idx) + self.leaves]
+
+    def update(self, idx, priorities):
+        nodes = np.asarray(idx) + self.leaves
+        self.tree[nodes] = priorities
+        # Repeated parents just recompute the same sum, so no need to dedupe.
+        while nodes[0] > 1:
+            nodes = nodes // 2
+            self.tree[nodes] = self.children[nodes].sum(axis=1)
+
+    def find(self, values):
+        """Leaf index whose cumulative priority range contains each value."""
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        while nodes[0] < self.leaves:
+            left_sum = self.tree[2 * nodes]
+            go_right = values >= left_sum
+            values -= left_sum * go_right
+            nodes = 2 * nodes + go_right
+        return nodes - self.leaves
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    Proportional prioritized replay (Schaul et al.): transitions are drawn
+    with probability p_i ** alpha / sum(p ** alpha) and returned with
+    importance-sampling weights (N * P(i)) ** -beta, normalised by the
+    batch maximum. `beta` rises by `beta_increment` per sample() call up
+    to 1. New transitions get the largest priority seen so far.
+    """
+    def __init__(self, capacity, state_shape, state_dtype=np.int8, seed=None, action_size=ACTION_SIZE,
+                 alpha=0.6, beta=0.4, beta_increment=1e-4, epsilon=1e-3):
+        super().__init__(capacity, state_shape, state_dtype, seed, action_size)
+        self.alpha = alpha
+        self.beta = beta
+        self.beta_increment = beta_increment
+        self.epsilon = epsilon
+        self.tree = SumTree(self.capacity)
+        self.max_priority = 1.0
+
+    def add(self, state, action, reward, next_state, done, next_mask):
+        i = super().add(state, action, reward, next_state, done, next_mask)
+        self.tree.update([i], self.max_priority)
+        return i
+
+    def add_batch(self, states, actions, rewards, next_states, dones, next_masks):
+        idx = super().add_batch(states, actions, rewards, next_states, dones, next_masks)
+        self.tree.update(idx, self.max_priority)
+        return idx
+
+    def sample(self, batch_size):
+        # One value per equal slice of the total, so a batch spreads over
+        # the whole distribution.
+        total = self.tree.total
+        bounds = np.linspace(0.0, total, batch_size + 1)
+        values = np.minimum(self.rng.uniform(bounds[:-1], bounds[1:]), np.nextafter(total, 0))
+        idx = np.minimum(self.tree.find(values), self.size - 1)
+
+        probs = self.tree[idx] / total
+        weights = (self.size * probs) ** -self.beta
+        weights /= weights.max()
+        self.beta = min(1.0, self.beta + self.beta_increment)
+        return (*self.gather(idx), idx, weights.astype(np.float32))
+
+    def update_priorities(self, indices, errors):
+        """Set priorities from the absolute TD errors of a sampled batch."""
+        priorities = (np.abs(errors) + self.epsilon) ** self.alpha
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(indices, priorities)
+
+    def save(self, folder):
+        state = super().save(folder)
+        np.save(os.path.join(folder, "priorities.npy"), self.tree.tree)
+        state.update(beta=self.beta, max_priority=self.max_priority)
+        return state
+
+    def restore(self, folder, state):
+        super().restore(folder, state)
+        # Copied in place: tree.children is a view of this array.
+        self.tree.tree[:] = np.load(os.path.join(folder, "priorities.npy"))
+        self.beta, self.max_priority = state["beta"], state["max_priority"]
+
+
+class SharedReplayBuffer(ReplayBuffer):
+    """
+    ReplayBuffer kept in one shared-memory block so several processes can
+    use it, e.g. actors adding transitions while a learner samples. Create
+    it in the parent (`ctx` is the multiprocessing context the children
+    will be started with), pass `handle` to each child and attach(handle)
+    there. The ring position is shared too, and add, add_batch and sample
+    hold a shared lock. The creator's close() frees the block.
+    """
+    # The columns must stay in the shared block.
+    _mmap_restore = False
+
+    def __init__(self, capacity, state_shape, state_dtype=np.int8, seed=None, action_size=ACTION_SIZE,
+                 ctx=mp):
+        spec = (int(capacity), tuple(state_shape), np.dtype(state_dtype).str, action_size,
+                ctx.RawArray("q", 2), ctx.Lock())
+        nbytes = sum(np.dtype(dtype).itemsize * np.prod(shape, dtype=np.int64)
+                     for _, dtype, shape in self._layout(*spec[:4]))
+        self._owner = True
+        self._map(shared_memory.SharedMemory(create=True, size=int(nbytes)), spec, seed)
+
+    @classmethod
+    def attach(cls, handle, seed=None):
+        name, spec = handle
+        buffer = cls.__new__(cls)
+        buffer._owner = False
+        buffer._map(shared_memory.SharedMemory(name=name), spec, seed)
+        return buffer
+
+    @staticmethod
+    def _layout(capacity, state_shape, state_dtype, action_size):
+        return (("states", state_dtype, (capacity, *state_shape)),
+                ("next_states", state_dtype, (capacity, *state_shape)),
+                ("actions", np.int32, (capacity,)),
+                ("rewards", np.float32, (capacity,)),
+                ("dones", np.bool_, (capacity,)),
+                ("next_masks", np.uint8, (capacity, (action_size + 7) // 8)))
+
+    def _map(self, shm, spec, seed):
+        self.shm = shm
+        self._spec = spec
+        self.capacity, state_shape, state_dtype, self.action_size, self._cursor, self.lock = spec
+        offset = 0
+        for name, dtype, shape in self._layout(*spec[:4]):
+            array = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            setattr(self, name, array)
+            offset += array.nbytes
+        self.rng = np.random.default_rng(seed)
+
+    @property
+    def handle(self):
+        return self.shm.name, self._spec
+
+    @property
+    def pos(self):
+        return self._cursor[0]
+
+    @pos.setter
+    def pos(self, value):
+        self._cursor[0] = value
+
+    @property
+    def size(self):
+        return self._cursor[1]
+
+    @size.setter
+    def size(self, value):
+        self._cursor[1] = value
+
+    def add(self, state, action, reward, next_state, done, next_mask):
+        with self.lock:
+            return super().add(state, action, reward, next_state, done, next_mask)
+
+    def add_batch(self, states, actions, rewards, next_states, dones, next_masks):
+        with self.lock:
+            return super().add_batch(states, actions, rewards, next_states, dones, next_masks)
+
+    def sample(self, batch_size):
+        with self.lock:
+            return super().sample(batch_size)
+
+    def save(self, folder):
+        with self.lock:
+            return super().save(folder)
+
+    def close(self):
+        # The array views must go before the mapping can be closed.
+        for name, _, _ in self._layout(*self._spec[:4]):
+            setattr(self, name, None)
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
@@ -0,0 +1,119 @@
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Packed entry layout (one int64 per entry, stored next to key ^ data so a
+# half-written entry never matches a probe):
+#   bits  0-20  move: src (7) | dst (7) | captured + 1 (7)
+#   bit     21  has move
+#   bits 22-23  bound type
+#   bits 24-31  depth
+#   bits 32-55  score + 2**23
+#   bits 56-61  search generation
+_SCORE_BIAS = 1 << 23
+_SCORE_MAX = _SCORE_BIAS - 1
+
+
+def _pack(depth, score, flag, move, age):
+    score = max(-_SCORE_MAX, min(_SCORE_MAX, int(score)))
+    data = (age << 56) | ((score + _SCORE_BIAS) << 32) | (depth << 24) | (flag << 22)
+    if move is not None:
+        src, dst, cap = move
+        data |= (1 << 21) | (src << 14) | (dst << 7) | (cap + 1)
+    return data
+
+
+def _unpack(data):
+    move = None
+    if data >> 21 & 1:
+        move = (data >> 14 & 127, data >> 7 & 127, (data & 127) - 1)
+    return data >> 24 & 255, (data >> 32 & 0xFFFFFF) - _SCORE_BIAS, data >> 22 & 3, move
+
+
+class TranspositionTable:
+    """
+    Fixed-size transposition table for MinimaxAgent.
+
+    Each bucket holds two entries: a depth-preferred slot that keeps the
+    deepest result of the current search, and an always-replace slot for
+    everything else. Memory use is fixed at construction from `size_mb`.
+    """
+    ENTRY_BYTES = 16
+
+    def __init__(self, size_mb=16, buffer=None):
+        self.buckets = self.nbytes(size_mb) // (2 * self.ENTRY_BYTES)
+        if buffer is None:
+            buffer = bytearray(self.nbytes(size_mb))
+        # [key ^ data, data] for slot 0 then slot 1 of every bucket.
+        self._raw = memoryview(buffer)
+        self.slots = self._raw.cast('q')
+        self.age = 0
+        self.used = 0
+        self.reset_stats()
+
+    @classmethod
+    def nbytes(cls, size_mb):
+        """Bytes actually used for a `size_mb` cap: a whole number of buckets, at least one."""
+        buckets = max(1, int(size_mb * 1024 * 1024) // (2 * cls.ENTRY_BYTES))
+        return buckets * 2 * cls.ENTRY_BYTES
+
+    def reset_stats(self):
+        self.probes = self.hits = self.stores = self.overwrites = 0
+
+    def new_search(self, age=None):
+        """
+        Start a new search: age old entries so they can be replaced and reset
+        stats. Processes sharing one table pass the owner's `age`.
+        """
+        self.age = (self.age + 1) & 63 if age is None else age
+        self.reset_stats()
+
+    def release(self):
+        """Drop the views on the buffer so a shared-memory block can be closed."""
+        self.slots.release()
+        self._raw.release()
+
+    def clear(self):
+        self._raw[:] = bytes(len(self._raw))
+        self.used = 0
+
+    def probe(self, key):
+        """Return (depth, score, flag, move) stored for `key`, or None."""
+        self.probes += 1
+        i = (key % self.buckets) * 4
+        slots = self.slots
+        for j in (i, i + 2):
+            data = slots[j + 1]
+            if slots[j] ^ data == key and data:
+                self.hits += 1
+                return _unpack(data)
+        return None
+
+    def store(self, key, depth, score, flag, move):
+        i = (key % self.buckets) * 4
+        slots = self.slots
+        data = _pack(depth, score, flag, move, self.age)
+        old = slots[i + 1]
+        if not old or slots[i] ^ old == key or (old >> 56) != self.age or depth >= (old >> 24 & 255):
+            j = i
+        else:
+            j = i + 2
+            old = slots[j + 1]
+        if not old:
+            self.used += 1
+        elif slots[j] ^ old != key:
+            self.overwrites += 1
+        slots[j] = key ^ data
+        slots[j + 1] = data
+        self.stores += 1
+
+    def stats(self):
+        total = self.buckets * 2
+        return {
+            "probes": self.probes,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.probes if self.probes else 0.0,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+            "fill": self.used / total,
+            "entries": total,
+            "size_mb": total * self.ENTRY_BYTES / (1024 * 1024),
+        }
@@ -0,0 +1,210 @@
+"""
+Headless agent-vs-agent matches across a process pool.
+
+    python arena.py minimax:time=0.05 random --games 200
+    python arena.py minimax:depth=6 minimax:depth=6,weights=data/new.json --games 2000 --min-elo -10
+
+Agents are ai.registry specs, built once per worker process and reset
+between games. Games are played in pairs from the same randomized
+opening with colours swapped. The report gives A's
+win/draw/loss, A's Elo relative to B with a 95% confidence interval, and
+each agent's average move latency and nodes/sec. With --min-elo the
+exit status is 1 when the whole interval lies below that value, so the
+command can gate a change.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from multiprocessing import Pool
+
+from ai.registry import make_agent, parse_spec
+from game.actions import legal_moves
+from game.board import ROWCOL, square
+from game.env import CheckersEnv
+from config import RED, WHITE, MAX_PLIES
+
+
+# Per worker process: one agent per (spec, colour), so networks are loaded
+# and compiled once rather than for every game.
+_agents = {}
+
+
+def get_agent(spec, color):
+    agent = _agents.get((spec, color))
+    if agent is None:
+        agent = _agents[spec, color] = make_agent(spec, color)
+    agent.reset()
+    return agent
+
+
+def play_opening(env, plies, rng):
+    """
+    Play `plies` uniformly random legal moves (a multi-jump hop counts as
+    one), then finish any multi-jump in progress, so the agents always
+    start on a whole turn.
+    """
+    ply = 0
+    while ply < plies or env.chain is not None:
+        ply += 1
+        chain = square(*env.chain) if env.chain is not None else None
+        moves = legal_moves(env.board, env.turn, chain)
+        if not moves or env.get_winner() is not None:
+            return
+        src, dst, _ = rng.choice(moves)
+        env.play_move(*ROWCOL[src], *ROWCOL[dst])
+
+
+def play_game(task):
+    """
+    One game; returns the score for `red_spec` (1, 0.5 or 0), how it ended
+    and per-colour move count, thinking time and searched nodes.
+    """
+    red_spec, white_spec, seed, opening_plies, max_plies = task
+    env = CheckersEnv()
+    env.reset()
+    play_opening(env, opening_plies, random.Random(seed))
+    agents = {RED: get_agent(red_spec, RED), WHITE: get_agent(white_spec, WHITE)}
+    totals = {color: {"moves": 0, "time": 0.0, "nodes": 0} for color in agents}
+    winner, reason = env.get_winner(), "capture"
+    plies = 0
+    while winner is None:
+        if plies >= max_plies:
+            reason = "ply limit"
+            break
+        color = env.turn
+        opponent = WHITE if color == RED else RED
+        chain = square(*env.chain) if env.chain is not None else None
+        if not legal_moves(env.board, color, chain):
+            winner, reason = opponent, "no moves"
+            break
+        start = time.perf_counter()
+        move = agents[color].get_move(env.board)
+        elapsed = time.perf_counter() - start
+        stats = getattr(agents[color], "stats", None) or {}
+        total = totals[color]
+        total["moves"] += 1
+        total["time"] += elapsed
+        total["nodes"] += stats.get("nodes", 0) + stats.get("helper_nodes", 0)
+        if move is None or not env.play_move(*move):
+            winner, reason = opponent, "illegal move"
+            break
+        plies += 1
+        winner = env.get_winner()
+    score = 0.5 if winner is None else float(winner == RED)
+    return {"score": score, "reason": reason, "red": totals[RED], "white": totals[WHITE]}
+
+
+def elo(score):
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return 400 * math.log10(score / (1 - score))
+
+
+def elo_interval(scores, z=1.96):
+    """
+    Elo and a Wilson score confidence interval from per-game scores.
+
+    The Wilson interval uses the binomial variance, which bounds that of
+    any mix of wins, draws and losses, so a sweep or an all-draw match
+    still gets an interval that reflects how few games it took. The point
+    estimate is kept half a game away from 0 and 1.
+    """
+    n = len(scores)
+    mean = sum(scores) / n
+    z2 = z * z / n
+    centre = (mean + z2 / 2) / (1 + z2)
+    margin = z / (1 + z2) * math.sqrt(mean * (1 - mean) / n + z2 / (4 * n))
+    mean = min(max(mean, 0.5 / n), 1 - 0.5 / n)
+    return elo(mean), elo(centre - margin), elo(centre + margin)
+
+
+def run(spec_a, spec_b, games, workers, opening_plies=4, max_plies=MAX_PLIES, seed=0):
+    tasks = []
+    for i in range((games + 1) // 2):
+        tasks.append((spec_a, spec_b, seed + i, opening_plies, max_plies))
+        tasks.append((spec_b, spec_a, seed + i, opening_plies, max_plies))
+    tasks = tasks[:games]
+
+    scores = []
+    counts = {"win": 0, "draw": 0, "loss": 0}
+    reasons = {}
+    # Keyed by side so a spec can play against itself.
+    totals = {side: {"moves": 0, "time": 0.0, "nodes": 0} for side in "ab"}
+    start = time.perf_counter()
+    with Pool(workers) as pool:
+        # imap keeps the task order, so game i is known to have A as red
+        # exactly when i is even.
+        for i, result in enumerate(pool.imap(play_game, tasks)):
+            a_is_red = i % 2 == 0
+            score = result["score"] if a_is_red else 1 - result["score"]
+            scores.append(score)
+            counts["win" if score == 1 else "loss" if score == 0 else "draw"] += 1
+            reasons[result["reason"]] = reasons.get(result["reason"], 0) + 1
+            for colour, side in (("red", "a" if a_is_red else "b"),
+                                 ("white", "b" if a_is_red else "a")):
+                for key, value in result[colour].items():
+                    totals[side][key] += value
+
+    rating, low, high = elo_interval(scores)
+    report = {
+        "a": spec_a, "b": spec_b, "games": len(scores), **counts,
+        "score": sum(scores) / len(scores),
+        "elo": rating, "elo_low": low, "elo_high": high,
+        "endings": reasons,
+        "wall_time": time.perf_counter() - start,
+        "agents": {},
+    }
+    for side, spec in (("a", spec_a), ("b", spec_b)):
+        total = totals[side]
+        report["agents"][side] = {
+            "spec": spec,
+            "moves": total["moves"],
+            "avg_move_ms": 1000 * total["time"] / max(total["moves"], 1),
+            "nps": total["nodes"] / total["time"] if total["nodes"] and total["time"] else None,
+        }
+    return report
+
+
+def print_report(report):
+    print(f"{report['a']}  vs  {report['b']}: {report['games']} games in {report['wall_time']:.1f} s")
+    print(f"  +{report['win']} ={report['draw']} -{report['loss']}  score {report['score']:.3f}")
+    print(f"  Elo {report['elo']:+.1f}  (95% CI {report['elo_low']:+.1f} .. {report['elo_high']:+.1f})")
+    print(f"  endings: {', '.join(f'{k} {v}' for k, v in sorted(report['endings'].items()))}")
+    for agent in report["agents"].values():
+        nps = f"{agent['nps']:,.0f} nodes/s" if agent["nps"] else "-"
+        print(f"  {agent['spec']:30s} {agent['avg_move_ms']:8.2f} ms/move  {nps}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless agent-vs-agent arena.")
+    parser.add_argument("a", help="agent spec, e.g. minimax:depth=6 or minimax:time=0.1")
+    parser.add_argument("b", help="opponent spec, e.g. random or numpy_q")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--opening-plies", type=int, default=4,
+                        help="random plies played before the agents take over")
+    parser.add_argument("--max-plies", type=int, default=MAX_PLIES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--min-elo", type=float,
+                        help="exit 1 if the Elo interval of A vs B lies entirely below this")
+    args = parser.parse_args(argv)
+    parse_spec(args.a), parse_spec(args.b)  # fail before starting the pool
+
+    report = run(args.a, args.b, args.games, args.workers,
+                 args.opening_plies, args.max_plies, args.seed)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.min_elo is not None and report["elo_high"] < args.min_elo:
+        print(f"FAIL: Elo below {args.min_elo:+.1f}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
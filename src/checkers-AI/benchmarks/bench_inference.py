@@ -0,0 +1,85 @@
+"""
+Many concurrent games asking a Q-network for moves: one call per move
+versus an InferenceServer batching the calls.
+
+Run from src/checkers-AI:
+    python -m benchmarks.bench_inference [games] [moves_per_game] [--numpy]
+"""
+import sys
+import threading
+import time
+
+import numpy as np
+
+from ai.batching import InferenceServer, BatchedQAgent
+from ai.inference import QPolicy
+from game.actions import legal_moves
+from game.board import square
+from game.env import CheckersEnv
+from config import RED, WHITE, STATE_SHAPE, ACTION_SIZE
+
+
+class DirectAgent(QPolicy):
+    def __init__(self, q_values, color):
+        self.q_function = q_values
+        self.color = color
+
+    def q_values(self, states):
+        return self.q_function(states)
+
+
+def play(make_agent, moves, results, i):
+    """Both sides of one game from the same network; restarts finished games."""
+    env = CheckersEnv()
+    env.reset()
+    agents = {RED: make_agent(RED), WHITE: make_agent(WHITE)}
+    for _ in range(moves):
+        chain = square(*env.chain) if env.chain is not None else None
+        if env.get_winner() is not None or not legal_moves(env.board, env.turn, chain):
+            env.reset()
+            agents = {RED: make_agent(RED), WHITE: make_agent(WHITE)}
+        move = agents[env.turn].get_move(env.board)
+        env.play_move(*move)
+    results[i] = moves
+
+
+def run(make_agent, games, moves):
+    results = [0] * games
+    threads = [threading.Thread(target=play, args=(make_agent, moves, results, i)) for i in range(games)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(results) / (time.perf_counter() - start)
+
+
+def network(use_numpy):
+    if use_numpy:
+        from ai.inference import NumpyQNetwork
+        rng = np.random.default_rng(0)
+        sizes = [int(np.prod(STATE_SHAPE)), 128, 128, ACTION_SIZE]
+        return NumpyQNetwork(layers=[(rng.standard_normal((a, b)).astype(np.float32) * 0.1,
+                                      np.zeros(b, dtype=np.float32)) for a, b in zip(sizes, sizes[1:])])
+    from ai.model import build_q_network, build_q_function
+    q = build_q_function(build_q_network(STATE_SHAPE, ACTION_SIZE))
+    return lambda states: q(states).numpy()
+
+
+def main(games=64, moves=50, use_numpy=False):
+    q_values = network(use_numpy)
+    q_values(np.zeros((1, *STATE_SHAPE), dtype=np.int8))  # build / trace once before timing
+    direct = run(lambda color: DirectAgent(q_values, color), games, moves)
+    with InferenceServer(q_values) as server:
+        batched = run(lambda color: BatchedQAgent(server, color), games, moves)
+        stats = server.stats()
+    print(f"{games} games, {'numpy' if use_numpy else 'tf.function'} network")
+    print(f"per-call : {direct:10.0f} moves/s")
+    print(f"batched  : {batched:10.0f} moves/s  ({batched / direct:.1f}x)")
+    print(f"batch fill {stats['batch_fill']:.0%} (mean {stats['mean_batch']:.1f} of {server.max_batch}), "
+          f"latency p50 {stats['p50_ms']:.2f} ms  p99 {stats['p99_ms']:.2f} ms")
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    main(*map(int, args[:2]), use_numpy="--numpy" in sys.argv)
@@ -0,0 +1,192 @@
+"""
+Move-generation benchmark: bitboard Board vs the old list-of-Piece grid.
+
+Run from src/checkers-AI:
+    python -m benchmarks.bench_movegen [--check]
+
+With --check it only verifies that the bitboard generator, and Board's
+per-piece get_all_pieces / get_valid_moves adapter, produce exactly the
+old generator's moves.
+"""
+import random
+import sys
+import timeit
+
+from game.board import Board, square
+from game.piece import Piece
+from config import ROWS, COLS, RED, WHITE
+
+
+class ListBoard:
+    """The original 8x12 list-of-Piece move generator, kept as a reference."""
+    def __init__(self, board):
+        self.board = [[0] * COLS for _ in range(ROWS)]
+        for row, pieces in enumerate(board.board):
+            for col, piece in enumerate(pieces):
+                if piece != 0:
+                    p = Piece(row, col, piece.color)
+                    p.king = piece.king
+                    self.board[row][col] = p
+
+    def get_all_pieces(self, color):
+        for row in self.board:
+            for piece in row:
+                if piece != 0 and piece.color == color:
+                    yield piece
+
+    def get_valid_moves(self, piece):
+        moves = {}
+        left = piece.col - 1
+        right = piece.col + 1
+        row = piece.row
+
+        if piece.color == RED or piece.king:
+            moves.update(self._traverse_left(row - 1, max(row - 3, -1), -1, piece.color, left))
+            moves.update(self._traverse_right(row - 1, max(row - 3, -1), -1, piece.color, right))
+        if piece.color == WHITE or piece.king:
+            moves.update(self._traverse_left(row + 1, min(row + 3, ROWS), 1, piece.color, left))
+            moves.update(self._traverse_right(row + 1, min(row + 3, ROWS), 1, piece.color, right))
+
+        return moves
+
+    def _traverse_left(self, start, stop, step, color, col, skipped=[]):
+        moves = {}
+        last = []
+        for r in range(start, stop, step):
+            if col < 0:
+                break
+
+            current = self.board[r][col]
+            if current == 0:
+                if skipped and not last:
+                    break
+                elif skipped:
+                    moves[(r, col)] = last + skipped
+                else:
+                    moves[(r, col)] = last
+
+                if last:
+                    row_direction = step
+                    moves.update(self._traverse_left(r + row_direction, stop, step, color, col - 1, skipped=last))
+                    moves.update(self._traverse_right(r + row_direction, stop, step, color, col + 1, skipped=last))
+                break
+
+            elif current.color == color:
+                break
+            else:
+                last = [current]
+
+            col -= 1
+
+        return moves
+
+    def _traverse_right(self, start, stop, step, color, col, skipped=[]):
+        moves = {}
+        last = []
+        for r in range(start, stop, step):
+            if col >= COLS:
+                break
+
+            current = self.board[r][col]
+            if current == 0:
+                if skipped and not last:
+                    break
+                elif skipped:
+                    moves[(r, col)] = last + skipped
+                else:
+                    moves[(r, col)] = last
+
+                if last:
+                    row_direction = step
+                    moves.update(self._traverse_left(r + row_direction, stop, step, color, col - 1, skipped=last))
+                    moves.update(self._traverse_right(r + row_direction, stop, step, color, col + 1, skipped=last))
+                break
+
+            elif current.color == color:
+                break
+            else:
+                last = [current]
+
+            col += 1
+
+        return moves
+
+
+def reference_positions(count=50, seed=1234):
+    """Positions reached by seeded random playouts from the start position."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = Board()
+        color = RED
+        for ply in range(rng.randrange(4, 120)):
+            moves = board.get_jumps(color) or board.get_steps(color)
+            if not moves:
+                break
+            src, dst, cap = rng.choice(moves)
+            board.move_square(src, dst)
+            if cap >= 0:
+                board.remove_square(cap)
+            color = WHITE if color == RED else RED
+        positions.append(board)
+    return positions
+
+
+def list_movegen(board):
+    moves = []
+    for color in (RED, WHITE):
+        for piece in board.get_all_pieces(color):
+            for (r, c), skipped in board.get_valid_moves(piece).items():
+                moves.append((square(piece.row, piece.col), square(r, c),
+                              square(skipped[0].row, skipped[0].col) if skipped else -1))
+    return moves
+
+
+def bitboard_movegen(board):
+    moves = []
+    for color in (RED, WHITE):
+        moves += board.get_jumps(color)
+        moves += board.get_steps(color)
+    return moves
+
+
+def check(positions):
+    """Compare both bitboard generators with the old list generator, move for move."""
+    for board in positions:
+        expected = sorted(list_movegen(ListBoard(board)))
+        got = sorted(bitboard_movegen(board))
+        assert got == expected, (board.position, set(got) ^ set(expected))
+        got = sorted(list_movegen(board))
+        assert got == expected, (board.position, set(got) ^ set(expected))
+
+
+def main(repeat=5, number=20):
+    positions = reference_positions()
+    check(positions)
+    legacy = [ListBoard(b) for b in positions]
+    total = sum(len(bitboard_movegen(b)) for b in positions)
+
+    def best(fn, boards):
+        return min(timeit.repeat(lambda: [fn(b) for b in boards], repeat=repeat, number=number)) / number
+
+    t_list = best(list_movegen, legacy)
+    t_adapter = best(list_movegen, positions)
+    t_bits = best(bitboard_movegen, positions)
+
+    print(f"{len(positions)} positions, {total} moves per pass")
+    print(f"list grid       : {t_list * 1e3:8.3f} ms/pass")
+    print(f"bitboard adapter: {t_adapter * 1e3:8.3f} ms/pass  ({t_list / t_adapter:5.1f}x)")
+    print(f"bitboard bulk   : {t_bits * 1e3:8.3f} ms/pass  ({t_list / t_bits:5.1f}x)")
+
+
+def main_check(count=500):
+    positions = reference_positions(count, seed=4321)
+    check(positions)
+    print(f"{len(positions)} positions: bitboard moves match the list generator")
+
+
+if __name__ == "__main__":
+    if "--check" in sys.argv:
+        main_check()
+    else:
+        main()
@@ -0,0 +1,46 @@
+"""
+Lazy-SMP scaling: time to a fixed depth and nodes/sec at 1, 2, 4 and 8 workers.
+
+Run from src/checkers-AI:
+    python -m benchmarks.bench_parallel [depth]
+"""
+import os
+import sys
+import time
+
+from ai.minimax import MinimaxAgent
+from benchmarks.bench_movegen import reference_positions
+from config import WHITE
+
+
+def run(workers, positions, depth):
+    agent = MinimaxAgent(depth=depth, color=WHITE, workers=workers)
+    try:
+        # Warm-up so pool start-up is not timed.
+        agent.depth = 1
+        agent.search(positions[0].copy())
+        agent.depth = depth
+        agent.tt.clear()
+        nodes = 0
+        start = time.perf_counter()
+        for board in positions:
+            agent.search(board)
+            nodes += agent.stats["nodes"] + agent.stats.get("helper_nodes", 0)
+        return time.perf_counter() - start, nodes
+    finally:
+        agent.close()
+
+
+def main(depth=8, worker_counts=(1, 2, 4, 8)):
+    positions = [b for b in reference_positions(60, seed=11) if b.winner() is None][:12]
+    print(f"{len(positions)} positions, depth {depth}, {os.cpu_count()} CPUs")
+    base = None
+    for workers in worker_counts:
+        elapsed, nodes = run(workers, positions, depth)
+        base = base or elapsed
+        print(f"{workers} workers: {elapsed:7.2f} s  speedup {base / elapsed:5.2f}x  "
+              f"{nodes / elapsed:10.0f} nodes/s")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
@@ -0,0 +1,54 @@
+"""
+Cold start: wall time from launching a fresh interpreter to the first menu
+frame on screen, compared with importing every agent backend up front the
+way main.py used to.
+
+Run from src/checkers-AI:
+    python -m benchmarks.bench_startup [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+FIRST_FRAME = """
+import sys
+for module in sys.argv[1:]:
+    __import__(module)
+import pygame
+import main
+pygame.init()
+screen = pygame.display.set_mode((main.WIDTH, main.HEIGHT), pygame.RESIZABLE)
+main.draw_menu(screen, main.menu_buttons(screen), (0, 0))
+pygame.display.flip()
+print("frame", flush=True)
+"""
+
+EAGER = ["ai.minimax", "ai.q_learning", "game.env", "numpy"]
+
+
+def cold_start(preload=()):
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    if not env.get("DISPLAY"):
+        env.setdefault("SDL_VIDEODRIVER", "dummy")
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", FIRST_FRAME, *preload],
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=env)
+    proc.stdout.readline()
+    elapsed = time.perf_counter() - start
+    proc.wait()
+    if proc.returncode:
+        raise RuntimeError(f"first-frame script failed with {proc.returncode}")
+    return elapsed
+
+
+def main(runs=5):
+    for label, preload in (("lazy (main.py)", ()), ("eager imports", EAGER)):
+        times = [cold_start(preload) for _ in range(runs)]
+        print(f"{label:15s} median {statistics.median(times):6.2f} s  "
+              f"min {min(times):6.2f} s  over {runs} runs")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
@@ -0,0 +1,58 @@
+"""
+Q-learning update throughput: transitions trained per second by the old
+predict/predict/loop/fit replay and by QLearningAgent's compiled step.
+
+Run from src/checkers-AI:
+    python -m benchmarks.bench_train [updates]
+"""
+import sys
+import time
+
+import numpy as np
+
+from ai.q_learning import QLearningAgent
+from config import STATE_SHAPE, ACTION_SIZE
+
+
+def fill(agent, count=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    states = rng.integers(-2, 3, size=(count, *STATE_SHAPE), dtype=np.int8)
+    agent.memory.add_batch(states, rng.integers(ACTION_SIZE, size=count),
+                           rng.standard_normal(count), np.roll(states, 1, axis=0),
+                           rng.random(count) < 0.05, rng.random((count, ACTION_SIZE)) < 0.05)
+
+
+def legacy_update(agent):
+    """The replay() body before the compiled training step."""
+    states, actions, rewards, next_states, dones, _, _, _ = agent.memory.sample(agent.batch_size)
+    q_current = agent.model.predict(states, verbose=0)
+    q_next = agent.model.predict(next_states, verbose=0)
+    q_target = q_current.copy()
+    for i in range(agent.batch_size):
+        if dones[i]:
+            q_target[i, actions[i]] = rewards[i]
+        else:
+            q_target[i, actions[i]] = rewards[i] + agent.gamma * np.max(q_next[i])
+    agent.model.fit(states, q_target, verbose=0)
+
+
+def rate(update, agent, updates):
+    update(agent)  # trace / build once before timing
+    start = time.perf_counter()
+    for _ in range(updates):
+        update(agent)
+    return updates * agent.batch_size / (time.perf_counter() - start)
+
+
+def main(updates=200):
+    agent = QLearningAgent(STATE_SHAPE, ACTION_SIZE)
+    fill(agent)
+    legacy = rate(legacy_update, agent, max(1, updates // 10))
+    compiled = rate(QLearningAgent.replay, agent, updates)
+    print(f"batch {agent.batch_size}")
+    print(f"predict/fit : {legacy:10.0f} samples/s")
+    print(f"tf.function : {compiled:10.0f} samples/s  ({compiled / legacy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
@@ -0,0 +1,34 @@
+"""
+Transposition-table sizing: hit rate and fill per search at several sizes.
+
+Run from src/checkers-AI:
+    python -m benchmarks.bench_tt [depth]
+"""
+import sys
+import time
+
+from ai.minimax import MinimaxAgent
+from benchmarks.bench_movegen import reference_positions
+from config import WHITE
+
+
+def main(depth=7, sizes=(0.25, 1, 4, 16)):
+    positions = [b for b in reference_positions(40, seed=7) if b.winner() is None][:10]
+    for size_mb in sizes:
+        agent = MinimaxAgent(depth=depth, color=WHITE, tt_size_mb=size_mb)
+        start = time.perf_counter()
+        nodes = hits = probes = 0
+        for board in positions:
+            agent.get_move(board)
+            nodes += agent.stats["nodes"]
+            hits += agent.stats["tt"]["hits"]
+            probes += agent.stats["tt"]["probes"]
+        elapsed = time.perf_counter() - start
+        tt = agent.stats["tt"]
+        print(f"{size_mb:6.2f} MB  {tt['entries']:8d} entries  "
+              f"nodes {nodes:8d}  hit rate {hits / max(probes, 1):6.1%}  "
+              f"fill {tt['fill']:6.1%}  overwrites/search {tt['overwrites']:6d}  {elapsed:6.2f} s")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
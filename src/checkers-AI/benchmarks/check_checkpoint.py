@@ -0,0 +1,98 @@
+"""
+Exact-resume check for ai.checkpoint, with uniform and prioritized replay.
+
+Run from src/checkers-AI:
+    python -m benchmarks.check_checkpoint [updates]
+
+For each buffer type an agent is trained for a while and checkpointed,
+then trained on: it adds new transitions and runs `updates` more
+updates. A fresh agent restored from the checkpoint repeats those steps,
+and its losses, weights and counters must come out identical. The buffer
+is full when it is saved, so restore() memory-maps its columns
+copy-on-write: they must be memmaps holding exactly the saved
+transitions, and a second restore checks that the resumed agent's writes
+did not reach the files.
+"""
+import sys
+import tempfile
+
+import numpy as np
+
+from ai.checkpoint import save_checkpoint, restore_checkpoint
+from ai.q_learning import QLearningAgent
+from config import STATE_SHAPE, ACTION_SIZE
+
+CAPACITY = 2000
+
+
+def make_agent(prioritized):
+    # A short target period so a target-network copy falls inside the check.
+    return QLearningAgent(STATE_SHAPE, ACTION_SIZE, memory_size=CAPACITY, prioritized=prioritized,
+                          target_sync=7)
+
+
+def columns(memory):
+    return {name: np.array(getattr(memory, name)) for name in memory.COLUMNS}
+
+
+def check_mapped(memory, expected):
+    for name, values in expected.items():
+        column = getattr(memory, name)
+        assert isinstance(column, np.memmap), (name, type(column))
+        assert np.array_equal(column, values), name
+
+
+def add_transitions(agent, count, seed):
+    rng = np.random.default_rng(seed)
+    states = rng.integers(-2, 3, size=(count, *STATE_SHAPE), dtype=np.int8)
+    agent.memory.add_batch(states, rng.integers(ACTION_SIZE, size=count),
+                           rng.standard_normal(count), np.roll(states, 1, axis=0),
+                           rng.random(count) < 0.05, rng.random((count, ACTION_SIZE)) < 0.05)
+
+
+def train_on(agent, updates):
+    """New transitions, `updates` updates and an epsilon decay; returns the losses."""
+    add_transitions(agent, 200, seed=2)
+    losses = [agent.replay() for _ in range(updates)]
+    agent.decay_epsilon()
+    return losses
+
+
+def check(prioritized, updates=20):
+    with tempfile.TemporaryDirectory() as directory:
+        agent = make_agent(prioritized)
+        add_transitions(agent, CAPACITY, seed=1)
+        for _ in range(updates):
+            agent.replay()
+        assert len(agent.memory) == CAPACITY
+        saved = columns(agent.memory)
+        save_checkpoint(agent, directory)
+        expected = train_on(agent, updates)
+
+        resumed = make_agent(prioritized)
+        restore_checkpoint(resumed, directory=directory)
+        assert len(resumed.memory) == CAPACITY, len(resumed.memory)
+        check_mapped(resumed.memory, saved)
+        losses = train_on(resumed, updates)
+        check_mapped(resumed.memory, columns(agent.memory))
+        assert losses == expected, (losses, expected)
+        for a, b in zip(agent.model.get_weights() + agent.target_model.get_weights(),
+                        resumed.model.get_weights() + resumed.target_model.get_weights()):
+            assert np.array_equal(a, b)
+        assert (resumed.train_steps, resumed.epsilon) == (agent.train_steps, agent.epsilon)
+        assert resumed.loss_history == agent.loss_history
+
+        again = make_agent(prioritized)
+        restore_checkpoint(again, directory=directory)
+        check_mapped(again.memory, saved)
+
+
+def main(updates=20):
+    for prioritized in (False, True):
+        check(prioritized, updates)
+        print(f"{'prioritized' if prioritized else 'uniform'} replay: "
+              f"{updates} updates after restore match exactly")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
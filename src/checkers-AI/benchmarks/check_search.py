@@ -0,0 +1,58 @@
+"""
+Hand-built positions with a known best line for MinimaxAgent.
+
+Run from src/checkers-AI:
+    python -m benchmarks.check_search
+"""
+from ai.minimax import MinimaxAgent, INF
+from game.board import Board, square
+from config import WHITE
+
+
+def make_board(red=(), white=(), kings=()):
+    """Board with men (or kings) on the given (row, col) squares only."""
+    board = Board()
+    board.red_bb = sum(1 << square(*rc) for rc in red)
+    board.white_bb = sum(1 << square(*rc) for rc in white)
+    board.king_bb = sum(1 << square(*rc) for rc in kings)
+    board.refresh()
+    return board
+
+
+def losing_capture():
+    """
+    White's only legal move is (3, 4)x(5, 6), and red answers with the
+    double jump (6, 5)x(4, 7)x(2, 5). White must not stand pat on the
+    position before it: the capture is forced.
+    """
+    board = make_board(red=[(4, 5), (5, 4), (6, 5), (7, 4)], white=[(0, 1), (3, 4), (3, 6)])
+    line = [(square(3, 4), square(5, 6), square(4, 5)),
+            (square(6, 5), square(4, 7), square(5, 6)),
+            (square(4, 7), square(2, 5), square(3, 6))]
+    return board, line
+
+
+def check():
+    board, line = losing_capture()
+    agent = MinimaxAgent(depth=1, color=WHITE, workers=1)
+    assert board.get_jumps(WHITE) == line[:1], board.get_jumps(WHITE)
+
+    undos = [board.apply_move(move) for move in line]
+    expected = agent.evaluate(board)
+    for undo in reversed(undos):
+        board.undo_move(undo)
+    assert expected < agent.evaluate(board)
+
+    score = agent.quiesce(board, -INF, INF, WHITE, agent.quiescence_depth)
+    assert score == expected, (score, expected)
+    assert agent.search(board) == line[0], agent.search(board)
+    assert agent.stats["score"] == expected, (agent.stats["score"], expected)
+
+
+def main():
+    check()
+    print("search positions ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Check for QLearningAgent.train_vectorized on a VectorCheckersEnv.
+
+Run from src/checkers-AI:
+    python -m benchmarks.check_vectorized [steps]
+
+Trains for `steps` steps on a few short games at once and checks the
+bookkeeping against the environment: one transition per game per step,
+and one finished episode (reward, epsilon decay, episode count) for each
+game the environment reset.
+"""
+import sys
+
+import numpy as np
+
+from ai.q_learning import QLearningAgent
+from game.env import VectorCheckersEnv
+from config import STATE_SHAPE, ACTION_SIZE
+
+
+class CountingEnv(VectorCheckersEnv):
+    """VectorCheckersEnv that counts steps and finished games."""
+    def __init__(self, num_envs, max_steps):
+        super().__init__(num_envs, max_steps)
+        self.steps = 0
+        self.finished = 0
+
+    def step(self, actions):
+        states, rewards, dones, infos = super().step(actions)
+        self.steps += 1
+        self.finished += sum("final_state" in info for info in infos)
+        return states, rewards, dones, infos
+
+
+def check(steps=60, num_envs=4, max_steps=25):
+    agent = QLearningAgent(STATE_SHAPE, ACTION_SIZE, memory_size=10000, epsilon_min=0.0,
+                           updates_per_step=0.25)
+    env = CountingEnv(num_envs, max_steps)
+    finished = agent.train_vectorized(env, steps)
+
+    assert env.steps == steps, env.steps
+    assert len(agent.memory) == num_envs * steps, len(agent.memory)
+    # Every game is truncated at max_steps, so some must have ended.
+    assert env.finished >= num_envs * (steps // max_steps), env.finished
+    assert len(finished) == env.finished, (len(finished), env.finished)
+    assert agent.episode_count == env.finished
+    assert agent.total_rewards == finished
+    assert len(agent.epsilon_history) == 1 + env.finished
+    assert np.isclose(agent.epsilon, agent.epsilon_decay ** env.finished)
+    # The first updates wait for a full batch; the rest follow updates_per_step.
+    assert 0 < agent.train_steps <= num_envs * steps * agent.updates_per_step, agent.train_steps
+    return env.finished
+
+
+def main(steps=60):
+    games = check(steps)
+    print(f"train_vectorized: {steps} steps, {games} games finished, counts match")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
@@ -0,0 +1,121 @@
+"""
+Perft: count the leaf nodes of the full move tree to a fixed depth.
+
+Moves follow the search rules (MinimaxAgent.get_all_possible_moves):
+captures are mandatory, and each hop of a multi-jump is one ply with the
+same side moving again. A position with no legal move has no children.
+
+Run from src/checkers-AI:
+    python -m benchmarks.perft [depth]
+"""
+import sys
+import time
+
+from game.board import Board, ROWCOL
+from benchmarks.bench_movegen import reference_positions
+from config import ROWS, COLS, RED, WHITE
+
+# Start position (RED to move), checked against naive_perft.
+START_PERFT = {1: 11, 2: 121, 3: 1222, 4: 10053, 5: 78629, 6: 577772}
+
+
+def perft(board, color, depth, chain=None):
+    if depth == 0:
+        return 1
+    if chain is not None:
+        moves = board.piece_jumps(chain)
+    else:
+        moves = board.get_jumps(color) or board.get_steps(color)
+    if depth == 1:
+        return len(moves)
+    other = RED if color == WHITE else WHITE
+    nodes = 0
+    for move in moves:
+        undo = board.apply_move(move)
+        if move[2] >= 0 and board.piece_jumps(move[1]):
+            nodes += perft(board, color, depth - 1, move[1])
+        else:
+            nodes += perft(board, other, depth - 1)
+        board.undo_move(undo)
+    return nodes
+
+
+def _grid(board):
+    """{(row, col): (color, king)} copied out of a Board."""
+    grid = {}
+    for color, bb in ((RED, board.red_bb), (WHITE, board.white_bb)):
+        for sq, (row, col) in enumerate(ROWCOL):
+            if bb >> sq & 1:
+                grid[row, col] = (color, bool(board.king_bb >> sq & 1))
+    return grid
+
+
+def _naive_moves(grid, color, chain=None):
+    """Straightforward per-square generator, independent of the bitboard code."""
+    jumps, steps = [], []
+    for (row, col), (owner, king) in grid.items():
+        if owner != color or (chain is not None and (row, col) != chain):
+            continue
+        forward = -1 if color == RED else 1
+        for dr in ((-1, 1) if king else (forward,)):
+            for dc in (-1, 1):
+                r, c = row + dr, col + dc
+                if not (0 <= r < ROWS and 0 <= c < COLS):
+                    continue
+                if (r, c) not in grid:
+                    steps.append(((row, col), (r, c), None))
+                elif grid[r, c][0] != color:
+                    lr, lc = r + dr, c + dc
+                    if 0 <= lr < ROWS and 0 <= lc < COLS and (lr, lc) not in grid:
+                        jumps.append(((row, col), (lr, lc), (r, c)))
+    if chain is not None:
+        return jumps
+    return jumps or steps
+
+
+def naive_perft(grid, color, depth, chain=None):
+    if depth == 0:
+        return 1
+    other = RED if color == WHITE else WHITE
+    nodes = 0
+    for src, dst, cap in _naive_moves(grid, color, chain):
+        child = dict(grid)
+        owner, king = child.pop(src)
+        if cap is not None:
+            del child[cap]
+        far_row = 0 if owner == RED else ROWS - 1
+        crowned = not king and dst[0] == far_row
+        child[dst] = (owner, king or crowned)
+        # A man crowned by a jump still continues as in Board.piece_jumps.
+        if cap is not None and _naive_moves(child, color, dst):
+            nodes += naive_perft(child, color, depth - 1, dst)
+        else:
+            nodes += naive_perft(child, other, depth - 1)
+    return nodes
+
+
+def check(positions, depth=3):
+    """Compare perft with naive_perft from both sides of every position."""
+    for board in positions:
+        grid = _grid(board)
+        for color in (RED, WHITE):
+            expected = naive_perft(grid, color, depth)
+            got = perft(board, color, depth)
+            assert got == expected, (board.position, color, depth, got, expected)
+
+
+def main(depth=6):
+    board = Board()
+    for d in range(1, depth + 1):
+        start = time.perf_counter()
+        nodes = perft(board, RED, d)
+        elapsed = time.perf_counter() - start
+        expected = START_PERFT.get(d)
+        status = "" if expected is None else ("ok" if nodes == expected else f"MISMATCH (expected {expected})")
+        print(f"perft({d}) = {nodes:10d}  {elapsed:7.3f} s  {nodes / max(elapsed, 1e-9):10.0f} nodes/s  {status}")
+    check(reference_positions(20, seed=99))
+    print("reference positions match the naive generator")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:2]))
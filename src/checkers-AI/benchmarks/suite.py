@@ -0,0 +1,176 @@
+"""
+Benchmark suite: perft, minimax, env stepping and replay sampling.
+
+Run from src/checkers-AI:
+    python -m benchmarks.suite [--json out.json] [--baseline old.json] [--quick]
+
+Every number is written under a flat "section.name" key so two JSON
+reports can be compared directly; --baseline prints the relative change
+of each rate against an earlier report. The perft section fails (exit
+status 1) when a node count differs from the known values.
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from ai.minimax import MinimaxAgent
+from ai.replay import ReplayBuffer, PrioritizedReplayBuffer
+from benchmarks import bench_movegen
+from benchmarks.bench_movegen import reference_positions
+from benchmarks.perft import START_PERFT, perft, check
+from game.board import Board
+from game.env import CheckersEnv
+from config import RED, WHITE, STATE_SHAPE, ACTION_SIZE
+
+BATCH_SIZE = 64  # QLearningAgent default
+
+
+def bench_perft(depth):
+    results = {}
+    board = Board()
+    for d in range(1, depth + 1):
+        start = time.perf_counter()
+        nodes = perft(board, RED, d)
+        elapsed = time.perf_counter() - start
+        results[f"start_d{d}.nodes"] = nodes
+        results[f"start_d{d}.nps"] = nodes / max(elapsed, 1e-9)
+        if d in START_PERFT and nodes != START_PERFT[d]:
+            raise AssertionError(f"perft({d}) = {nodes}, expected {START_PERFT[d]}")
+    start = time.perf_counter()
+    check(reference_positions(20, seed=99))
+    bench_movegen.check(reference_positions(50, seed=98))
+    results["reference.check_time"] = time.perf_counter() - start
+    return results
+
+
+def bench_search(depth, count=8):
+    positions = [b for b in reference_positions(40, seed=7) if b.winner() is None][:count]
+    agent = MinimaxAgent(depth=depth, color=WHITE, workers=1)
+    nodes, elapsed = 0, 0.0
+    to_depth = [0.0] * depth
+    for board in positions:
+        agent.get_move(board)
+        nodes += agent.stats["nodes"]
+        elapsed += agent.stats["time"]
+        for it in agent.stats["iterations"]:
+            to_depth[it["depth"] - 1] += it["time"]
+    results = {"positions": len(positions), "nodes": nodes, "nps": nodes / max(elapsed, 1e-9)}
+    for d, total in enumerate(to_depth, 1):
+        results[f"time_to_d{d}"] = total / len(positions)
+    return results
+
+
+def bench_env(steps, seed=0):
+    rng = np.random.default_rng(seed)
+    env = CheckersEnv(max_steps=300)
+    env.reset()
+    games = 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        legal = np.flatnonzero(env.legal_action_mask())
+        if len(legal) == 0:
+            env.reset()
+            games += 1
+            continue
+        _, _, done, info = env.step(rng.choice(legal))
+        if done or info["truncated"]:
+            env.reset()
+            games += 1
+    elapsed = time.perf_counter() - start
+    return {"steps": steps, "games": games, "steps_per_s": steps / elapsed}
+
+
+def bench_replay(capacity, batches, seed=0):
+    rng = np.random.default_rng(seed)
+    states = rng.integers(-2, 3, size=(capacity, *STATE_SHAPE), dtype=np.int8)
+    actions = rng.integers(ACTION_SIZE, size=capacity)
+    rewards = rng.standard_normal(capacity)
+    dones = rng.random(capacity) < 0.05
+    masks = rng.random((capacity, ACTION_SIZE)) < 0.05
+    results = {}
+    for name, cls in (("uniform", ReplayBuffer), ("prioritized", PrioritizedReplayBuffer)):
+        buffer = cls(capacity, STATE_SHAPE, seed=seed)
+        start = time.perf_counter()
+        for i in range(capacity):
+            buffer.add(states[i], actions[i], rewards[i], states[i - 1], dones[i], masks[i])
+        results[f"{name}.add_per_s"] = capacity / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(batches):
+            indices = buffer.sample(BATCH_SIZE)[-2]
+            buffer.update_priorities(indices, rng.random(BATCH_SIZE))
+        results[f"{name}.samples_per_s"] = batches * BATCH_SIZE / (time.perf_counter() - start)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(quick=False):
+    sections = {
+        "perft": lambda: bench_perft(5 if quick else 6),
+        "search": lambda: bench_search(4 if quick else 6),
+        "env": lambda: bench_env(2000 if quick else 20000),
+        "replay": lambda: bench_replay(5000 if quick else 50000, 50 if quick else 500),
+    }
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "quick": quick,
+        "results": {},
+    }
+    for name, bench in sections.items():
+        start = time.perf_counter()
+        for key, value in bench().items():
+            report["results"][f"{name}.{key}"] = value
+        print(f"{name:8s} done in {time.perf_counter() - start:6.2f} s")
+    return report
+
+
+def print_report(report, baseline=None):
+    old = baseline["results"] if baseline else {}
+    for key, value in report["results"].items():
+        line = f"  {key:36s} {value:14,.4g}" if isinstance(value, float) else f"  {key:36s} {value:14,}"
+        if isinstance(old.get(key), (int, float)) and old[key] and key.endswith(("nps", "_per_s")):
+            line += f"  {value / old[key] - 1:+7.1%}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Checkers performance benchmarks.")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="earlier --json report to compare rates against")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, for a smoke test")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    try:
+        report = run(args.quick)
+    except AssertionError as exc:
+        print(f"FAIL: {exc}")
+        return 1
+    print(f"commit {report['commit']}  python {report['python']}")
+    print_report(report, baseline)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
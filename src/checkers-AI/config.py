@@ -2,6 +2,7 @@
 # Game Settings
 WIDTH, HEIGHT = 600, 600
 ROWS, COLS = 8, 12
+MAX_PLIES = 300  # a headless game still running after this many plies is a draw
 SQUARE_SIZE = WIDTH // COLS
 BTN_W, BTN_H  = 350, 70
 BTN_RADIUS    = 12
@@ -28,9 +29,64 @@ BEIGE = (245, 245, 220)
 
 # Performance
 FPS = 60
+IDLE_WAIT_MS = 250  # longest sleep between frames while waiting for input
+LOG_LEVEL    = "INFO"  # "DEBUG" shows per-move training and search details
+LOG_INTERVAL = 1.0  # seconds between repeats of the same log message (0 = no limit)
+METRICS_PATH = "data/metrics.json"  # counter/timer snapshot written after games and training (.csv also works)
+GAME_LOG_PATH = "data/game_logs.rec"  # utils.loggers.Logger game records (read_game_records)
+GAME_LOG_BUFFER = 4096  # rows per Logger chunk written to disk
 
 # AI Settings
 DEPTH_LIMIT  = 4
 STATE_SHAPE  = (8, 12, 1)
-ACTION_SIZE  = 8 * 12 * 8 * 8  # max moves from any square to any
-MODEL_PATH   = "data/best_model_50.weights.h5"
\ No newline at end of file
+ACTION_SIZE  = (ROWS * COLS // 2) * 4 * 2  # playable square x direction x step/jump
+MODEL_PATH   = "data/best_model_50.weights.h5"
+NUMPY_MODEL_PATH = "data/best_model_50.npz"  # MODEL_PATH exported by `python -m ai.inference`
+TT_SIZE_MB   = 16  # memory cap for the minimax transposition table
+MOVE_TIME    = 0.5  # seconds per minimax move in the GUI; None searches exactly DEPTH_LIMIT
+MAX_DEPTH    = 32   # deepest iteration when searching under MOVE_TIME
+ASPIRATION_WINDOW = 25  # half-width of the root window around the previous score
+SEARCH_WORKERS = 1  # Lazy-SMP processes per minimax search (1 = single core)
+QUIESCENCE_DEPTH = 6  # max capture turns searched past the horizon; multi-jumps always finish (0 = off)
+MCTS_PLAYOUTS = 800  # leaf evaluations per MCTSAgent move (time_limit may stop it sooner)
+MCTS_BATCH   = 16  # leaves collected under virtual loss per evaluator call
+MCTS_CPUCT   = 1.5  # PUCT exploration constant
+MCTS_VIRTUAL_LOSS = 1  # visits of loss added to a path while its leaf awaits evaluation
+MCTS_ROLLOUT_DEPTH = 40  # plies per random playout of RolloutEvaluator
+INFERENCE_MAX_BATCH = 64  # states per batched Q-network call (ai.batching)
+INFERENCE_MAX_WAIT = 0.002  # seconds the oldest request may wait for its batch to fill
+SERVER_HOST  = "127.0.0.1"  # server.py listens here; local use only
+SERVER_PORT  = 8765
+SERVER_AI    = "minimax:depth=8"  # agent spec for ai_move unless a game picks its own
+SERVER_MIN_MOVE_TIME = 0.005  # shortest ai_move search a request may ask for ...
+SERVER_MOVE_TIME = 0.1  # ... the default ...
+SERVER_MAX_MOVE_TIME = 2.0  # ... and the most a request may ask for
+SERVER_ENGINE_QUEUE = 8  # searches queued per engine process before ai_move answers "busy"
+SERVER_SESSION_TTL = 600  # seconds an untouched game is kept
+PONDER       = True  # GUI minimax keeps searching the expected reply during the human's turn
+PRIORITIZED_REPLAY = False  # sum-tree prioritized replay for QLearningAgent
+PER_ALPHA    = 0.6  # how strongly TD error shapes replay sampling (0 = uniform)
+PER_BETA     = 0.4  # initial importance-sampling correction, annealed to 1
+UPDATES_PER_STEP = 0.25  # QLearningAgent gradient steps per environment step
+TARGET_SYNC_STEPS = 1000  # gradient steps between target-network copies
+TARGET_TAU   = None  # Polyak rate for a soft target update every step (None = periodic copy)
+ACTOR_ENVS   = 8  # games each ai.distributed actor process plays at once
+ACTOR_EPSILON = 0.4  # exploration of the most exploratory actor ...
+ACTOR_EPSILON_ALPHA = 7  # ... falling to ACTOR_EPSILON ** (1 + alpha) for the last one
+SHARED_REPLAY_SIZE = 200000  # transitions in the actors' shared replay buffer
+LEARNER_WARMUP = 2000  # transitions collected before the learner starts updating
+WEIGHT_PUBLISH_UPDATES = 100  # learner updates between weight refreshes for the actors
+CHECKPOINT_DIR = "data/checkpoints"  # full training checkpoints (ai.checkpoint)
+CHECKPOINT_KEEP = 3  # newest checkpoints kept; older ones are deleted
+
+# Evaluation weights per term (see game.board.EVAL_TERMS). A JSON object at
+# EVAL_WEIGHTS_PATH overrides any of them.
+EVAL_WEIGHTS = {
+    "men": 100,
+    "kings": 160,
+    "advancement": 3,
+    "back_rank": 8,
+    "centre": 4,
+    "mobility": 2,
+}
+EVAL_WEIGHTS_PATH = "data/eval_weights.json"
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""
+Compact action encoding shared by the RL environment and the Q agent.
+
+An action is (playable square, diagonal direction, step or jump), flattened
+as (square_index * 4 + direction) * 2 + jump. Only the dark squares are
+playable, so there are ROWS * COLS // 2 * 4 * 2 actions.
+"""
+import numpy as np
+from game.board import ROWCOL, DIRECTIONS, OFFSETS
+from config import ACTION_SIZE
+
+PLAYABLE = tuple(sq for sq, (r, c) in enumerate(ROWCOL) if (r + c) % 2 == 1)
+_INDEX = {sq: i for i, sq in enumerate(PLAYABLE)}
+_DIRECTION = {off: d for d, off in enumerate(OFFSETS)}
+
+assert ACTION_SIZE == len(PLAYABLE) * len(DIRECTIONS) * 2
+
+
+def move_to_action(move):
+    """Action index of a (src, dst, captured) board move."""
+    src, dst, cap = move
+    jump = cap >= 0
+    direction = _DIRECTION[(dst - src) // 2 if jump else dst - src]
+    return (_INDEX[src] * 4 + direction) * 2 + jump
+
+
+def action_to_coords(action):
+    """(start_row, start_col, end_row, end_col) for an action; the move may be illegal or off the board."""
+    rest, jump = divmod(int(action), 2)
+    index, direction = divmod(rest, 4)
+    row, col = ROWCOL[PLAYABLE[index]]
+    dr, dc = DIRECTIONS[direction]
+    reach = 2 if jump else 1
+    return row, col, row + dr * reach, col + dc * reach
+
+
+def legal_moves(board, color, chain=None):
+    """Moves CheckersEnv.play_move accepts: every step and jump, or only further jumps mid multi-jump."""
+    if chain is not None:
+        return board.piece_jumps(chain)
+    return board.legal_moves(color)
+
+
+def legal_action_mask(board, color, chain=None):
+    """Boolean mask over ACTION_SIZE marking the legal actions for `color`."""
+    mask = np.zeros(ACTION_SIZE, dtype=bool)
+    for move in legal_moves(board, color, chain):
+        mask[move_to_action(move)] = True
+    return mask
@@ -0,0 +1,188 @@
+import numpy as np
+from game.board import Board, square, ROWCOL
+from game.actions import action_to_coords, legal_action_mask
+from utils.helpers import board_to_input
+from utils.metrics import COUNTERS
+from config import *
+
+
+class CheckersEnv:
+    """
+    Headless checkers rules and RL interface. Game adds the pygame window,
+    input handling and drawing on top of this class; nothing here imports
+    pygame, so it can run in training workers.
+    """
+    def __init__(self, max_steps=None):
+        self.max_steps = max_steps
+        self._init()
+        self.observation_shape = STATE_SHAPE
+        self.action_size = ACTION_SIZE
+
+    def _init(self):
+        self.board = Board()
+        self.selected = None
+        self.valid_moves = {}
+        self.turn = RED
+        self.last_move = None
+        self.movable_pieces = []
+        # Square of a piece in the middle of a multi-jump; it must keep jumping.
+        self.chain = None
+        self.steps = 0
+
+    def _get_state(self):
+        return board_to_input(self.board)
+
+    def get_winner(self):
+        return self.board.winner()
+
+    def reset(self):
+        self._init()
+        self.update_movables()
+        return self._get_state()
+
+    def step(self, action):
+        """
+        Execute one RL action and return (next_state, reward, done, info).
+        """
+        moved = self.play_move(*action_to_coords(action))
+        self.steps += 1
+        COUNTERS["env.steps"] += 1
+
+        # Reward logic
+        if moved:
+            reward = 1
+            if self.get_winner():
+                reward = 100
+        else:
+            reward = -1
+
+        done = self.get_winner() is not None
+        truncated = not done and self.max_steps is not None and self.steps >= self.max_steps
+        return self._get_state(), reward, done, {"truncated": truncated}
+
+    def legal_action_mask(self):
+        """Boolean mask over ACTION_SIZE of the actions step() accepts right now."""
+        chain = square(*self.chain) if self.chain is not None else None
+        return legal_action_mask(self.board, self.turn, chain)
+
+    def piece_moves(self, piece):
+        """
+        Valid moves for `piece` as {(row, col): [captured Piece] or []},
+        limited to further jumps during a multi-jump. Built from the board's
+        cached move list.
+        """
+        grid = self.board.board
+        moves = {}
+        for src, dst, cap in self.board.square_moves(piece.color).get(square(piece.row, piece.col), ()):
+            if cap >= 0:
+                row, col = ROWCOL[cap]
+                moves[ROWCOL[dst]] = [grid[row][col]]
+            elif self.chain is None:
+                moves[ROWCOL[dst]] = []
+        return moves
+
+    def play_move(self, start_row, start_col, end_row, end_col):
+        """
+        Play one move (a single jump of a multi-jump counts as one) for the
+        side to move. Returns False, leaving everything unchanged, if the move
+        is not legal.
+        """
+        if not (0 <= start_row < ROWS and 0 <= start_col < COLS):
+            return False
+        if self.chain is not None and (start_row, start_col) != self.chain:
+            return False
+        piece = self.board.board[start_row][start_col]
+        if not piece or piece.color != self.turn:
+            return False
+        valid = self.piece_moves(piece)
+        if (end_row, end_col) not in valid:
+            return False
+
+        skipped = valid[(end_row, end_col)]
+        self.board.move(piece, end_row, end_col)
+        if skipped:
+            self.board.remove(skipped)
+        self.last_move = ((start_row, start_col), (end_row, end_col))
+
+        # Double jump
+        if skipped and self.board.piece_jumps(square(end_row, end_col)):
+            self.chain = (end_row, end_col)
+            self.selected = piece
+            self.valid_moves = self.piece_moves(piece)
+            self.update_movables()
+            return True
+
+        # End turn
+        self._change_turn()
+        self.selected = None
+        self.valid_moves = {}
+        self.update_movables()
+        return True
+
+    def update_movables(self):
+        if self.chain is not None:
+            self.movable_pieces = [self.chain]
+            return
+        self.movable_pieces = [ROWCOL[sq] for sq in sorted(self.board.square_moves(self.turn))]
+
+    def select(self, row, col):
+        """Click-style input: pick a piece, then its destination. True when the turn ends."""
+        if self.selected and (row, col) in self.valid_moves:
+            self.play_move(self.selected.row, self.selected.col, row, col)
+            return self.chain is None
+
+        # Pick a piece
+        piece = self.board.board[row][col]
+        if piece and piece.color == self.turn and self.chain in (None, (row, col)):
+            self.selected = piece
+            self.valid_moves = self.piece_moves(piece)
+            return False
+
+        # Deselect
+        if self.chain is None:
+            self.selected = None
+        return False
+
+    def _change_turn(self):
+        self.turn = WHITE if self.turn == RED else RED
+        self.chain = None
+
+
+class VectorCheckersEnv:
+    """
+    N independent CheckersEnv games stepped together.
+
+    step() takes one action per game and returns stacked NumPy arrays.
+    Games that finish (or hit `max_steps`) are reset automatically; their
+    last observation and its legal-action mask are returned in
+    infos[i]["final_state"] and infos[i]["final_mask"], and the returned
+    state is the first state of the new game.
+    """
+    def __init__(self, num_envs, max_steps=500):
+        self.num_envs = num_envs
+        self.envs = [CheckersEnv(max_steps=max_steps) for _ in range(num_envs)]
+        self.observation_shape = STATE_SHAPE
+        self.action_size = ACTION_SIZE
+
+    def reset(self):
+        return np.stack([env.reset() for env in self.envs])
+
+    def legal_action_masks(self):
+        return np.stack([env.legal_action_mask() for env in self.envs])
+
+    def step(self, actions):
+        states = np.empty((self.num_envs, *STATE_SHAPE), dtype=np.int8)
+        rewards = np.empty(self.num_envs, dtype=np.float32)
+        dones = np.empty(self.num_envs, dtype=bool)
+        infos = []
+        for i, (env, action) in enumerate(zip(self.envs, actions)):
+            state, reward, done, info = env.step(int(action))
+            if done or info["truncated"]:
+                info["final_state"] = state
+                info["final_mask"] = env.legal_action_mask()
+                state = env.reset()
+            states[i] = state
+            rewards[i] = reward
+            dones[i] = done
+            infos.append(info)
+        return states, rewards, dones, infos
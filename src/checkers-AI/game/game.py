@@ -1,121 +1,23 @@
 import pygame
-from game.board import Board
-from game.gui import (
-    draw_board, draw_pieces,
-    highlight_moves, highlight_last_move,
-    highlight_current_pieces
-)
+from game.env import CheckersEnv
+from game.board import ROWCOL, iter_bits
+from game.gui import draw_board, draw_square
 from config import *
 
-class Game:
+class Game(CheckersEnv):
     def __init__(self, win):
         self.win = win
-        self._init()
-        self.observation_shape = STATE_SHAPE
-        self.action_size = ACTION_SIZE
-
-    def _init(self):
-        self.board = Board()
-        self.selected = None
-        self.valid_moves = {}
-        self.turn = RED
-        self.last_move = None
-        self.movable_pieces = []
-
-    def _get_state(self):
-        from utils.helpers import state_to_input
-        return state_to_input(self.board.board)
-
-    def get_winner(self):
-        return self.board.winner()
-
-    def reset(self):
-        self._init()
-        self.update_movables()
-        return self._get_state()
-
-    def step(self, action):
-        """
-        Execute one RL action and return (next_state, reward, done, info).
-        """
-        # Decode flat action to board coordinates
-        start_row = action // (COLS * ROWS)
-        start_col = (action // ROWS) % COLS
-        end_row = action % ROWS
-        end_col = action % COLS
-
-        moved = False
-        reward = 0
-        try:
-            piece = self.board.board[start_row][start_col]
-            if piece and piece.color == self.turn:
-                self.selected = piece
-                moved = self.select(end_row, end_col)
-        except IndexError:
-            pass
-
-        # Reward logic
-        if moved:
-            reward = 1
-            if self.get_winner():
-                reward = 100
-        else:
-            reward = -1
-
-        done = self.get_winner() is not None
-        return self._get_state(), reward, done, {}
-
-    def update_movables(self):
-        self.movable_pieces = []
-        for row in range(ROWS):
-            for col in range(COLS):
-                piece = self.board.board[row][col]
-                if piece and piece.color == self.turn and self.board.get_valid_moves(piece):
-                    self.movable_pieces.append((row, col))
-
-    def select(self, row, col):
-        if self.selected and (row, col) in self.valid_moves:
-            skipped = self.valid_moves[(row, col)]
-            sr, sc = self.selected.row, self.selected.col
-            self.board.move(self.selected, row, col)
-            if skipped:
-                self.board.remove(skipped)
-            self.last_move = ((sr, sc), (row, col))
-            self.selected.move(row, col)
-
-            # Double jump
-            extra = {}
-            if skipped:
-                extra = self.board.get_valid_moves(self.selected)
-            if skipped and any(extra.values()):
-                self.valid_moves = extra
-                return False
-
-            # End turn
-            self._change_turn()
-            self.selected = None
-            self.valid_moves = {}
-            self.update_movables()
-            return True
-
-        # Pick a piece
-        piece = self.board.board[row][col]
-        if piece and piece.color == self.turn:
-            self.selected = piece
-            self.valid_moves = {}
-            return False
-
-        # Deselect
-        self.selected = None
-        return False
-
-    def _change_turn(self):
-        self.turn = WHITE if self.turn == RED else RED
+        self._view = None
+        # What each square showed in the last drawn frame; None forces a full redraw.
+        self._frame = None
+        super().__init__()
 
     def handle_events(self, ai_agent=None):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return False
+            if event.type in (pygame.VIDEORESIZE, pygame.WINDOWEXPOSED):
+                self.invalidate()
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if (ai_agent is None or self.turn != ai_agent.color) and not self.get_winner():
                     x, y = event.pos
@@ -123,48 +25,79 @@ class Game:
                     row = y // SQUARE_SIZE
                     self.select(row, col)
         # AI move if provided
-        if ai_agent and self.turn == ai_agent.color and not self.get_winner():
-            self._ai_move(ai_agent)
+        if ai_agent and not self.get_winner():
+            if self.turn == ai_agent.color:
+                self._ai_move(ai_agent)
+            elif hasattr(ai_agent, "ponder"):
+                ai_agent.ponder(self.board)
         return True
 
     def _ai_move(self, ai_agent):
         move = ai_agent.get_move(self.board)
         if not move:
             return
-        sr, sc, er, ec = move
-        piece = self.board.board[sr][sc]
-        if not piece or piece.color != ai_agent.color:
-            return
-        valid = self.board.get_valid_moves(piece)
-        if (er, ec) not in valid:
-            return
-        skipped = valid[(er, ec)]
-        # Perform move
-        self.board.move(piece, er, ec)
-        if skipped:
-            self.board.remove(skipped)
-        # Record last move
-        self.last_move = ((sr, sc), (er, ec))
-        # Multi-capture
-        if skipped and self.board.get_valid_moves(piece):
-            return
-        # Finish turn
-        self._change_turn()
-        self.selected = None
-        self.valid_moves = {}
-        self.update_movables()
+        self.play_move(*move)
 
     def update(self):
+        # Moves only change with the position, the side to move or the
+        # selection, so most frames have nothing to recompute.
+        selected = (self.selected.row, self.selected.col) if self.selected else None
+        view = (self.board.position, self.turn, self.chain, selected)
+        if view == self._view:
+            return
+        self._view = view
         if self.selected:
-            self.valid_moves = self.board.get_valid_moves(self.selected)
+            self.valid_moves = self.piece_moves(self.selected)
         else:
             self.valid_moves = {}
         self.update_movables()
 
-    def draw(self):
-        draw_board(self.win)
+    def invalidate(self):
+        """Make the next draw() repaint the whole window."""
+        self._frame = None
+
+    def wait(self, timeout):
+        """Idle until an event arrives or `timeout` ms pass, leaving the event queued."""
+        event = pygame.event.wait(timeout)
+        if event.type != pygame.NOEVENT:
+            pygame.event.post(event)
+
+    def _squares(self):
+        """{(row, col): (piece, last_move, movable, target)} for every square that isn't plain."""
+        board = self.board
+        frame = {}
+        for bb, color in ((board.red_bb, RED), (board.white_bb, WHITE)):
+            for sq in iter_bits(bb):
+                frame[ROWCOL[sq]] = [(color, bool(board.king_bb >> sq & 1)), False, False, False]
+        marks = []
         if self.last_move:
-            highlight_last_move(self.win, self.last_move)
-        highlight_current_pieces(self.win, self.movable_pieces)
-        draw_pieces(self.win, self.board)
-        highlight_moves(self.win, self.valid_moves)
+            marks += [(pos, 1) for pos in self.last_move]
+        marks += [(pos, 2) for pos in self.movable_pieces]
+        marks += [(pos, 3) for pos in self.valid_moves]
+        for pos, layer in marks:
+            look = frame.setdefault(pos, [None, False, False, False])
+            look[layer] = True
+        return {pos: tuple(look) for pos, look in frame.items()}
+
+    def draw(self):
+        """
+        Repaint only the squares whose contents changed since the last
+        frame and return their rects for pygame.display.update(); an empty
+        list means the screen is already up to date.
+        """
+        frame = self._squares()
+        plain = (None, False, False, False)
+        if self._frame is None:
+            draw_board(self.win)
+            for (row, col), look in frame.items():
+                draw_square(self.win, row, col, look)
+            self._frame = frame
+            return [self.win.get_rect()]
+
+        dirty = []
+        for pos in self._frame.keys() | frame.keys():
+            look = frame.get(pos, plain)
+            if self._frame.get(pos, plain) != look:
+                dirty.append(draw_square(self.win, *pos, look))
+        self._frame = frame
+        return dirty
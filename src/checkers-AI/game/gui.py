@@ -1,31 +1,51 @@
 import pygame
+from functools import lru_cache
 from config import *
 
-def draw_board(win):
-    win.fill(BLACK)
+@lru_cache(maxsize=4)
+def board_surface(size):
+    """The empty board pre-rendered for a window of `size`; rebuilt only when the size changes."""
+    surface = pygame.Surface(size)
+    surface.fill(BLACK)
     for row in range(ROWS):
         for col in range(COLS):
             color = WHITE if (row + col) % 2 == 0 else GREY
-            pygame.draw.rect(win, color, (col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
+            pygame.draw.rect(surface, color, (col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
+    return surface
 
-def draw_pieces(win, board):
-    for row in board.board:
-        for piece in row:
-            if piece != 0:
-                piece.draw(win)
+@lru_cache(maxsize=None)
+def piece_sprite(color, king):
+    """One square-sized transparent sprite per piece type, drawn once."""
+    from game.piece import Piece
+    sprite = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
+    center = (SQUARE_SIZE // 2, SQUARE_SIZE // 2)
+    radius = SQUARE_SIZE // 2 - Piece.PADDING
+    pygame.draw.circle(sprite, color, center, radius)
+    if king:
+        pygame.draw.circle(sprite, (255, 215, 0), center, radius // 2)  # gold color for king
+    return sprite
 
-def highlight_moves(win, moves):
-    for (r, c) in moves:
-        pygame.draw.circle(win, BLUE, (c*SQUARE_SIZE+SQUARE_SIZE//2, r*SQUARE_SIZE+SQUARE_SIZE//2), 15)
+def square_rect(row, col):
+    return pygame.Rect(col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
 
-def highlight_last_move(win, last_move):
-    (sr, sc), (er, ec) = last_move
-    rect_start = pygame.Rect(sc*SQUARE_SIZE, sr*SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
-    rect_end   = pygame.Rect(ec*SQUARE_SIZE, er*SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
-    pygame.draw.rect(win, YELLOW, rect_start, 4)
-    pygame.draw.rect(win, YELLOW, rect_end, 4)
+def draw_board(win):
+    win.blit(board_surface(win.get_size()), (0, 0))
 
-def highlight_current_pieces(win, pieces):
-    for (r, c) in pieces:
-        center = (c*SQUARE_SIZE + SQUARE_SIZE//2, r*SQUARE_SIZE + SQUARE_SIZE//2)
-        pygame.draw.circle(win, GREEN, center, SQUARE_SIZE//2 - 5, 3)
+def draw_square(win, row, col, look):
+    """
+    Redraw one square from scratch. `look` is (piece, last_move, movable,
+    target): piece is None or (color, king), the rest are booleans. Layers
+    are stacked in the same order as a full frame.
+    """
+    piece, last_move, movable, target = look
+    rect = square_rect(row, col)
+    win.blit(board_surface(win.get_size()), rect, rect)
+    if last_move:
+        pygame.draw.rect(win, YELLOW, rect, 4)
+    if movable:
+        pygame.draw.circle(win, GREEN, rect.center, SQUARE_SIZE//2 - 5, 3)
+    if piece is not None:
+        win.blit(piece_sprite(*piece), rect)
+    if target:
+        pygame.draw.circle(win, BLUE, rect.center, 15)
+    return rect
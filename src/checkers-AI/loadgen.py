@@ -0,0 +1,196 @@
+"""
+Load generator for server.py.
+
+    python server.py &
+    python loadgen.py --games 2000 --concurrency 500 [--json report.json]
+
+Plays `games` games against a running server, `concurrency` at a time,
+multiplexed over `connections` sockets. In each game red plays random
+legal moves and white asks the server's engine (ai_move); a game ends on
+a result or after --max-plies. Busy replies are retried with exponential
+back-off. Reports games/sec and p50/p99 latency per request type.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from config import SERVER_HOST, SERVER_PORT, SERVER_MOVE_TIME, MAX_PLIES
+
+
+class Connection:
+    """One socket with any number of requests in flight, matched to replies by id."""
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self._ids = itertools.count()
+        self._pending = {}
+        self._task = asyncio.create_task(self._read())
+
+    @classmethod
+    async def open(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port, limit=1 << 16)
+        return cls(reader, writer)
+
+    async def _read(self):
+        try:
+            while line := await self.reader.readline():
+                response = json.loads(line)
+                future = self._pending.pop(response.get("id"), None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("server closed the connection"))
+
+    async def request(self, op, **fields):
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self.writer.write(json.dumps({"op": op, "id": request_id, **fields}).encode() + b"\n")
+        await self.writer.drain()
+        return await future
+
+    async def close(self):
+        self.writer.close()
+        self._task.cancel()
+
+
+class LoadGenerator:
+    def __init__(self, connections, move_time, max_plies, ai=None, seed=0):
+        self.connections = connections
+        self.move_time = move_time
+        self.max_plies = max_plies
+        self.ai = ai
+        self.rng = random.Random(seed)
+        self.latency = defaultdict(list)
+        self.results = defaultdict(int)
+        self.busy = 0
+        self.errors = 0
+
+    async def _call(self, conn, op, **fields):
+        for attempt in itertools.count():
+            start = time.perf_counter()
+            response = await conn.request(op, **fields)
+            if response.get("error") == "busy":
+                # Exponential back-off with jitter, so a full engine pool is not flooded with retries.
+                self.busy += 1
+                delay = min(max(self.move_time, 0.01) * 2 ** attempt, 2.0)
+                await asyncio.sleep(delay * (0.5 + self.rng.random()))
+                continue
+            self.latency[op].append(time.perf_counter() - start)
+            if "error" in response:
+                self.errors += 1
+                raise RuntimeError(f"{op}: {response['error']}")
+            return response
+
+    async def play(self, conn):
+        options = {"ai": self.ai} if self.ai else {}
+        state = await self._call(conn, "create", **options)
+        game = state["game"]
+        plies = 0
+        try:
+            while state["status"] == "playing" and plies < self.max_plies:
+                if state["turn"] == "red":
+                    moves = (await self._call(conn, "legal", game=game))["moves"]
+                    state = await self._call(conn, "move", game=game, move=self.rng.choice(moves))
+                else:
+                    state = await self._call(conn, "ai_move", game=game, time=self.move_time)
+                plies += 1
+            self.results[state["status"] if state["status"] != "playing" else "unfinished"] += 1
+        finally:
+            await self._call(conn, "close", game=game)
+        return plies
+
+    async def run(self, games, concurrency):
+        todo = iter(range(games))
+        plies = 0
+
+        async def worker(index):
+            nonlocal plies
+            conn = self.connections[index % len(self.connections)]
+            for _ in todo:
+                try:
+                    played = await self.play(conn)
+                except RuntimeError as exc:
+                    print(f"game failed: {exc}", file=sys.stderr)
+                    self.results["failed"] += 1
+                else:
+                    plies += played
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+        report = {
+            "games": games,
+            "concurrency": concurrency,
+            "connections": len(self.connections),
+            "time": elapsed,
+            "games_per_s": games / elapsed,
+            "plies_per_s": plies / elapsed,
+            "results": dict(self.results),
+            "busy": self.busy,
+            "errors": self.errors,
+            "latency": {},
+        }
+        for op, values in self.latency.items():
+            ms = np.array(values) * 1000
+            report["latency"][op] = {"count": len(ms), "p50_ms": float(np.percentile(ms, 50)),
+                                     "p99_ms": float(np.percentile(ms, 99))}
+        return report
+
+
+def print_report(report):
+    print(f"{report['games']} games, {report['concurrency']} at a time over {report['connections']} "
+          f"connections, in {report['time']:.1f} s")
+    print(f"  {report['games_per_s']:.1f} games/s  {report['plies_per_s']:.0f} plies/s  "
+          f"busy retries {report['busy']}  errors {report['errors']}")
+    print(f"  results: {', '.join(f'{k} {v}' for k, v in sorted(report['results'].items()))}")
+    for op, lat in sorted(report["latency"].items()):
+        print(f"  {op:8s} {lat['count']:8d} requests  p50 {lat['p50_ms']:8.2f} ms  p99 {lat['p99_ms']:8.2f} ms")
+
+
+async def _main(args):
+    connections = [await Connection.open(args.host, args.port) for _ in range(args.connections)]
+    try:
+        generator = LoadGenerator(connections, args.move_time, args.max_plies, args.ai, args.seed)
+        report = await generator.run(args.games, args.concurrency)
+        report["server"] = await connections[0].request("stats")
+    finally:
+        for conn in connections:
+            await conn.close()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load generator for the checkers server.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200, help="games in progress at once")
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--move-time", type=float, default=SERVER_MOVE_TIME,
+                        help="seconds per ai_move search")
+    parser.add_argument("--max-plies", type=int, default=MAX_PLIES)
+    parser.add_argument("--ai", help="agent spec for white (default: the server's)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(_main(args))
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
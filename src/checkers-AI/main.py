@@ -1,18 +1,82 @@
+import logging
 import os
 import sys
+import time
+from functools import lru_cache
 import pygame
 from game.game import Game
-from ai.q_learning import QLearningAgent
-from ai.minimax import MinimaxAgent
+from utils.loggers import Logger, setup_logging
+from utils.metrics import metrics
 from config import *
-import numpy as np
 
+log = logging.getLogger(__name__)
 
-# Fonts
-pygame.font.init()
-TITLE_FONT  = pygame.font.SysFont("Verdana", 72, bold=True)
-OPT_FONT    = pygame.font.SysFont("Verdana", 28)
-CREDIT_FONT = pygame.font.SysFont("Verdana", 20, italic=True)
+
+TRAIN_MODE    = False   # Set True to train the Q‑agent 
+EPISODES      = 200     # How many episodes to run during training
+SAVE_INTERVAL = 50      # Save the model every N episodes
+LOG_GAMES     = False   # Record every training move to GAME_LOG_PATH
+TRAIN_ACTORS  = 0       # >0: train with this many self-play processes (ai.distributed) instead
+TRAIN_UPDATES = 50000   # learner updates for a TRAIN_ACTORS run
+TRAIN_ENVS    = 1       # >1: play this many training games at once (QLearningAgent.train_vectorized)
+TRAIN_ROUND   = 500     # steps per train_vectorized call when TRAIN_ENVS > 1
+
+
+# Fonts are loaded on first use (SysFont scans the system fonts) and kept.
+@lru_cache(maxsize=None)
+def get_font(name, size, bold=False, italic=False):
+    if not pygame.font.get_init():
+        pygame.font.init()
+    return pygame.font.SysFont(name, size, bold=bold, italic=italic)
+
+
+def title_font():
+    return get_font("Verdana", 72, bold=True)
+
+
+def option_font():
+    return get_font("Verdana", 28)
+
+
+def credit_font():
+    return get_font("Verdana", 20, italic=True)
+
+
+# Agent backends by menu option. Each module is imported only when its
+# option is picked, so Human vs Human never loads search or TensorFlow.
+def minimax_agent():
+    from ai.minimax import MinimaxAgent
+    if MOVE_TIME is None:
+        return MinimaxAgent(depth=DEPTH_LIMIT, color=WHITE)
+    return MinimaxAgent(depth=MAX_DEPTH, color=WHITE, time_limit=MOVE_TIME)
+
+
+def q_learning_agent():
+    if not TRAIN_MODE and os.path.isfile(NUMPY_MODEL_PATH):
+        # Exported network: plays without importing TensorFlow.
+        from ai.inference import NumpyQAgent
+        return NumpyQAgent(NUMPY_MODEL_PATH, color=WHITE)
+    from ai.q_learning import QLearningAgent
+    agent = QLearningAgent(state_shape=STATE_SHAPE, action_size=ACTION_SIZE)
+    agent.color = WHITE
+    #  Load only if you're in PLAY mode
+    if os.path.isfile(MODEL_PATH) and not TRAIN_MODE:
+        agent.load(MODEL_PATH)
+    return agent
+
+
+AGENTS = {
+    1: minimax_agent,
+    2: q_learning_agent,
+}
+
+
+@lru_cache(maxsize=4)
+def gradient_surface(size, top_color, bottom_color):
+    """Menu background, drawn once per window size."""
+    surface = pygame.Surface(size)
+    draw_vertical_gradient(surface, top_color, bottom_color)
+    return surface
 
 
 def draw_vertical_gradient(surface, top_color, bottom_color):
@@ -36,8 +100,7 @@ def draw_text_center(surface, text, font, color, center, shadow=False):
     surface.blit(lbl, rect)
 
 
-def show_menu(screen):
-    """Returns 0=HvH, 1=HvMinimax, 2=HvQ-Learning"""
+def menu_buttons(screen):
     WIDTH, HEIGHT = screen.get_size()
     options = ["Human vs Human", "Human vs Minimax", "Human vs Q-Learning"]
     total_h = len(options) * BTN_H + (len(options) - 1) * GAP
@@ -48,34 +111,51 @@ def show_menu(screen):
         x = (WIDTH - BTN_W) // 2
         y = start_y + i * (BTN_H + GAP)
         buttons.append((pygame.Rect(x, y, BTN_W, BTN_H), text))
+    return buttons
+
 
+def draw_menu(screen, buttons, mouse):
+    WIDTH, HEIGHT = screen.get_size()
+    # background
+    screen.blit(gradient_surface(screen.get_size(), TOP_COLOR, BOTTOM_COLOR), (0, 0))
+    # title
+    draw_text_center(screen, "Checkers AI", title_font(), WHITE, (WIDTH // 2, 80), shadow=True)
+
+    # draw buttons
+    for rect, text in buttons:
+        hover = rect.collidepoint(mouse)
+        bg = BTN_HOVER if hover else BTN_COLOR
+        pygame.draw.rect(screen, bg, rect, border_radius=BTN_RADIUS)
+        pygame.draw.rect(screen, WHITE, rect, 2, border_radius=BTN_RADIUS)
+        draw_text_center(screen, text, option_font(), WHITE, rect.center)
+
+    # credits
+    draw_text_center(screen,
+                     "BY: Sarim Shah, Moiz Ul Haq, Muhammad Rouhan",
+                     credit_font(), YELLOW,
+                     (WIDTH // 2, HEIGHT - 40))
+
+
+def show_menu(screen):
+    """Returns 0=HvH, 1=HvMinimax, 2=HvQ-Learning"""
+    buttons = menu_buttons(screen)
     clock = pygame.time.Clock()
     selected = None
+    shown = None
     while selected is None:
         clock.tick(FPS)
-        mx, my = pygame.mouse.get_pos()
-
-        # background
-        draw_vertical_gradient(screen, TOP_COLOR, BOTTOM_COLOR)
-        # title
-        draw_text_center(screen, "Checkers AI", TITLE_FONT, WHITE, (WIDTH // 2, 80), shadow=True)
-
-        # draw buttons
-        for rect, text in buttons:
-            hover = rect.collidepoint(mx, my)
-            bg = BTN_HOVER if hover else BTN_COLOR
-            pygame.draw.rect(screen, bg, rect, border_radius=BTN_RADIUS)
-            pygame.draw.rect(screen, WHITE, rect, 2, border_radius=BTN_RADIUS)
-            draw_text_center(screen, text, OPT_FONT, WHITE, rect.center)
-
-        # credits
-        draw_text_center(screen,
-                         "BY: Sarim Shah, Moiz Ul Haq, Muhammad Rouhan",
-                         CREDIT_FONT, YELLOW,
-                         (WIDTH // 2, HEIGHT - 40))
-
-        pygame.display.flip()
-        for e in pygame.event.get():
+        mouse = pygame.mouse.get_pos()
+        hover = next((i for i, (rect, _) in enumerate(buttons) if rect.collidepoint(mouse)), None)
+        # Only repaint when the hovered button changes.
+        if hover != shown:
+            draw_menu(screen, buttons, mouse)
+            pygame.display.flip()
+            shown = hover
+        events = pygame.event.get() or [pygame.event.wait(IDLE_WAIT_MS)]
+        for e in events:
+            if e.type == pygame.WINDOWEXPOSED:
+                draw_menu(screen, buttons, mouse)
+                pygame.display.flip()
             if e.type == pygame.QUIT:
                 pygame.quit(); sys.exit()
             if e.type == pygame.MOUSEBUTTONDOWN and e.button == 1:
@@ -88,7 +168,7 @@ def show_menu(screen):
 
 def show_winner(screen, winner):
     WIDTH, HEIGHT = screen.get_size()
-    font = pygame.font.SysFont(None, 72)
+    font = get_font(None, 72)
     if winner == RED:
         text = "Red Wins!"
     elif winner == WHITE:
@@ -97,27 +177,28 @@ def show_winner(screen, winner):
         text = "Draw!"
     label = font.render(text, True, YELLOW)
     rect = label.get_rect(center=(WIDTH // 2, HEIGHT // 2 - 30))
-    prompt = pygame.font.SysFont(None, 36).render("Click to return to menu", True, YELLOW)
+    prompt = get_font(None, 36).render("Click to return to menu", True, YELLOW)
     prect = prompt.get_rect(center=(WIDTH // 2, HEIGHT // 2 + 30))
+    redraw = True
     while True:
-        screen.fill(BLACK)
-        screen.blit(label, rect)
-        screen.blit(prompt, prect)
-        pygame.display.flip()
-        for event in pygame.event.get():
-            if event.type in (pygame.QUIT, pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
-                return
+        if redraw:
+            screen.fill(BLACK)
+            screen.blit(label, rect)
+            screen.blit(prompt, prect)
+            pygame.display.flip()
+        # Nothing animates here, so block until input instead of polling.
+        event = pygame.event.wait()
+        if event.type in (pygame.QUIT, pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+            return
+        redraw = event.type == pygame.WINDOWEXPOSED
 
 
 def main():
+    setup_logging()
     pygame.init()
     screen = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
     pygame.display.set_caption("Checkers AI")
 
-    
-    TRAIN_MODE    = False   # Set True to train the Q‑agent 
-    EPISODES      = 200     # How many episodes to run during training
-    SAVE_INTERVAL = 50      # Save the model every N episodes
 
     while True:
         mode = show_menu(screen)
@@ -125,58 +206,111 @@ def main():
         game = Game(screen)
         clock = pygame.time.Clock()
 
-        ai_agent = None
-        if mode == 1:
-            ai_agent = MinimaxAgent(depth=DEPTH_LIMIT, color=WHITE)
-
-        elif mode == 2:
-            ai_agent = QLearningAgent(state_shape=STATE_SHAPE, action_size=ACTION_SIZE)
-            ai_agent.color = WHITE
-
-            #  Load only if you're in PLAY mode
-            if os.path.isfile(MODEL_PATH) and not TRAIN_MODE:
-                ai_agent.load(MODEL_PATH)
+        ai_agent = AGENTS[mode]() if mode in AGENTS else None
 
+        if mode == 2:
             #  If TRAIN_MODE, run the training loop, then go back to menu
+            if TRAIN_MODE and TRAIN_ACTORS:
+                from ai.distributed import train
+                log.info("Starting actor-learner training with %d actors...", TRAIN_ACTORS)
+                _, stats = train(TRAIN_UPDATES, TRAIN_ACTORS, agent=ai_agent)
+                log.info("Training completed: %.0f actor steps/s, %.1f updates/s, %d games",
+                         stats["actor_steps_per_s"], stats["updates_per_s"], stats["games"])
+                ai_agent.save(MODEL_PATH)
+                metrics.save(METRICS_PATH)
+                continue
+            if TRAIN_MODE and TRAIN_ENVS > 1:
+                from game.env import VectorCheckersEnv
+                from ai.checkpoint import restore_checkpoint, save_checkpoint
+                resumed = restore_checkpoint(ai_agent)
+                if resumed:
+                    log.info("Resuming from %s at episode %d", resumed, ai_agent.episode_count)
+                log.info("Starting vectorized Q-Learning training with %d games at once...", TRAIN_ENVS)
+                env = VectorCheckersEnv(TRAIN_ENVS)
+                game_log = Logger() if LOG_GAMES else None
+                next_save = (ai_agent.episode_count // SAVE_INTERVAL + 1) * SAVE_INTERVAL
+                while ai_agent.episode_count < EPISODES:
+                    rewards = ai_agent.train_vectorized(env, TRAIN_ROUND, game_log)
+                    if ai_agent.episode_count >= next_save:
+                        next_save = (ai_agent.episode_count // SAVE_INTERVAL + 1) * SAVE_INTERVAL
+                        ai_agent.save(MODEL_PATH)
+                        save_checkpoint(ai_agent)
+                        log.info("Episode %d: mean reward = %.2f", ai_agent.episode_count,
+                                 sum(rewards) / max(len(rewards), 1))
+                        metrics.save(METRICS_PATH)
+
+                ai_agent.save(MODEL_PATH)
+                if game_log is not None:
+                    game_log.close()
+                log.info("Training completed!")
+                metrics.save(METRICS_PATH)
+                ai_agent.plot_training()
+                continue
             if TRAIN_MODE:
-                print("\nStarting Q-Learning training...")
-                best_reward = -np.inf
-                for ep in range(1, EPISODES + 1):
-                    game.reset()
-                    r = ai_agent.train_episode(game)
+                from game.env import CheckersEnv
+                from ai.checkpoint import restore_checkpoint, save_checkpoint
+                resumed = restore_checkpoint(ai_agent)
+                if resumed:
+                    log.info("Resuming from %s at episode %d", resumed, ai_agent.episode_count)
+                log.info("Starting Q-Learning training...")
+                env = CheckersEnv()
+                game_log = Logger() if LOG_GAMES else None
+                best_reward = float("-inf")
+                for ep in range(ai_agent.episode_count + 1, EPISODES + 1):
+                    r = ai_agent.train_episode(env, game_log)
 
                     if ep % SAVE_INTERVAL == 0:
                         ai_agent.save(MODEL_PATH)
-                        print(f"Episode {ep}: reward = {r:.2f}")
+                        save_checkpoint(ai_agent)
+                        log.info("Episode %d: reward = %.2f", ep, r)
+                        metrics.save(METRICS_PATH)
                         if r > best_reward:
                             best_reward = r
                             ai_agent.save(f"data/best_model_{ep}.weights.h5")
 
                     # optional slow render to watch training
                     if ep % 100 == 0:
+                        game.board = env.board
                         game.draw()
                         pygame.display.flip()
                         clock.tick(1)
 
                 ai_agent.save(MODEL_PATH)
-                print("Training completed!")
+                if game_log is not None:
+                    game_log.close()
+                log.info("Training completed!")
+                metrics.save(METRICS_PATH)
                 ai_agent.plot_training()
                 
 
                 # back to menu
                 continue
 
-        
+        # Search on a worker thread so the window keeps responding.
+        if ai_agent is not None:
+            from ai.background import BackgroundAgent
+            ai_agent = BackgroundAgent(ai_agent)
+
         running = True
         while running:
             clock.tick(FPS)
+            start = time.perf_counter()
             running = game.handle_events(ai_agent if mode != 0 else None)
             game.update()
-            game.draw()
-            pygame.display.flip()
+            dirty = game.draw()
+            if dirty:
+                pygame.display.update(dirty)
+                # Work per repainted frame, not counting the tick or idle waits.
+                metrics.observe("gui.frame", time.perf_counter() - start)
+            elif ai_agent is None or game.turn != ai_agent.color:
+                # Idle: nothing changed and it's a human's turn.
+                game.wait(IDLE_WAIT_MS)
             if game.get_winner() is not None:
                 running = False
 
+        if ai_agent is not None:
+            ai_agent.close()
+        log.debug("Metrics written to %s", metrics.save(METRICS_PATH))
         show_winner(screen, game.get_winner())
 
 if __name__ == "__main__":
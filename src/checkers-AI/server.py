@@ -0,0 +1,325 @@
+"""
+Headless checkers server: many concurrent games over a local socket.
+
+    python server.py [--port 8765] [--workers N]
+    python loadgen.py --games 1000 --concurrency 500   # load generator
+
+The protocol is one JSON object per line in each direction. A request has
+an "op" and may carry an "id", which is echoed in its response. Requests
+on one connection run concurrently and may be answered out of order;
+requests for the same game run one at a time.
+
+    create   {"ai": spec?}                 -> {"game", "turn", "board", "status"}
+    legal    {"game"}                      -> {"moves": [[sr, sc, er, ec], ...]}
+    move     {"game", "move": [sr, sc, er, ec]}  -> {"ok", "turn", "board", "status", ...}
+    ai_move  {"game", "time"?}             -> {"move", "turn", "board", "status", ...}
+    state    {"game"}                      -> {"turn", "board", "status", ...}
+    close    {"game"}                      -> {"ok"}
+    stats    {}                            -> server counters and latencies
+
+"ai" is an ai.registry spec (default SERVER_AI) for the side that
+ai_move plays; "time" is its per-move limit in seconds, capped at
+[SERVER_MIN_MOVE_TIME, SERVER_MAX_MOVE_TIME]. Searches run in a process pool of `workers`; when
+workers * SERVER_ENGINE_QUEUE searches are already waiting, ai_move
+answers {"error": "busy"} straight away and the client should retry.
+A search that overruns gets {"error": "timeout"} but keeps its place in
+the queue until its worker is done with it.
+Boards are 8 strings of ".rRwW" (capitals are kings); "status" is
+"playing", "red", "white" (the winner) or "draw".
+"""
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing as mp
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ai.registry import make_agent, parse_spec
+from game.actions import legal_moves
+from game.board import Board, ROWCOL, square
+from game.env import CheckersEnv
+from utils.metrics import metrics
+from config import (RED, WHITE, MAX_PLIES, SERVER_HOST, SERVER_PORT, SERVER_AI, SERVER_MOVE_TIME,
+                    SERVER_MIN_MOVE_TIME, SERVER_MAX_MOVE_TIME, SERVER_ENGINE_QUEUE, SERVER_SESSION_TTL)
+
+COLOR_NAMES = {RED: "red", WHITE: "white"}
+# Requests a connection may have in flight before the server stops reading it.
+CONNECTION_INFLIGHT = 256
+# Seconds an ai_move waits past its search time before answering "timeout".
+ENGINE_GRACE = 2.0
+
+# Per engine process: one agent per (spec, colour), kept so its
+# transposition table carries over between requests.
+_agents = {}
+
+
+def _engine_move(spec, color, snapshot, chain, time_limit):
+    """Runs in a pool process: the agent's move as (sr, sc, er, ec) and its node count."""
+    agent = _agents.get((spec, color))
+    if agent is None:
+        agent = _agents[spec, color] = make_agent(spec, color)
+    board = Board.from_snapshot(snapshot)
+    # The session's chain is passed on explicitly: this process may be
+    # serving other games, or may not have played the previous hop at all.
+    if hasattr(agent, "search"):
+        agent.time_limit = time_limit
+        move = agent.search(board, chain)
+    else:
+        move = agent.greedy_move(board, chain)
+    coords = None if move is None else (*ROWCOL[move[0]], *ROWCOL[move[1]])
+    return coords, getattr(agent, "stats", {}).get("nodes", 0)
+
+
+def render(board):
+    rows = []
+    for row in range(8):
+        line = []
+        for col in range(12):
+            sq = square(row, col)
+            ch = "r" if board.red_bb >> sq & 1 else "w" if board.white_bb >> sq & 1 else "."
+            line.append(ch.upper() if board.king_bb >> sq & 1 else ch)
+        rows.append("".join(line))
+    return rows
+
+
+class Session:
+    def __init__(self, ai):
+        self.env = CheckersEnv()
+        self.env.reset()
+        self.ai = ai
+        self.plies = 0
+        self.lock = asyncio.Lock()
+        self.used = time.monotonic()
+
+    def chain(self):
+        env = self.env
+        return square(*env.chain) if env.chain is not None else None
+
+    def legal(self):
+        return legal_moves(self.env.board, self.env.turn, self.chain())
+
+    def status(self):
+        winner = self.env.get_winner()
+        if winner is not None:
+            return COLOR_NAMES[winner]
+        if not self.legal():
+            return COLOR_NAMES[RED if self.env.turn == WHITE else WHITE]
+        if self.plies >= MAX_PLIES:
+            return "draw"
+        return "playing"
+
+    def view(self):
+        return {"turn": COLOR_NAMES[self.env.turn], "board": render(self.env.board),
+                "chain": self.env.chain, "status": self.status()}
+
+
+class GameServer:
+    def __init__(self, workers=None, ai=SERVER_AI, move_time=SERVER_MOVE_TIME,
+                 max_move_time=SERVER_MAX_MOVE_TIME, engine_queue=SERVER_ENGINE_QUEUE,
+                 session_ttl=SERVER_SESSION_TTL):
+        self.workers = workers or os.cpu_count() or 1
+        self.ai = ai
+        self.move_time = move_time
+        self.max_move_time = max_move_time
+        self.session_ttl = session_ttl
+        # The parent never imports TensorFlow or forks after starting the loop.
+        self.pool = ProcessPoolExecutor(self.workers, mp_context=mp.get_context("spawn"))
+        self.engine_capacity = self.workers * engine_queue
+        self.engine_pending = 0
+        self.sessions = {}
+        self._next_game = 0
+        self.counts = {"requests": 0, "errors": 0, "busy": 0, "timeouts": 0,
+                       "ai_moves": 0, "games_created": 0, "games_finished": 0, "expired": 0}
+        self._latency = {op: deque(maxlen=10000) for op in ("create", "legal", "move", "ai_move")}
+
+    async def serve(self, host=SERVER_HOST, port=SERVER_PORT):
+        server = await asyncio.start_server(self.handle, host, port, limit=1 << 16)
+        reaper = asyncio.create_task(self._reap())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            reaper.cancel()
+            self.pool.shutdown(cancel_futures=True)
+
+    async def handle(self, reader, writer):
+        inflight = asyncio.Semaphore(CONNECTION_INFLIGHT)
+        write_lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while True:
+                # Backpressure: stop reading while this connection is saturated.
+                await inflight.acquire()
+                line = await reader.readline()
+                if not line:
+                    inflight.release()
+                    break
+                task = asyncio.create_task(self._respond(line, writer, write_lock, inflight))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+
+    async def _respond(self, line, writer, write_lock, inflight):
+        start = time.perf_counter()
+        request = {}
+        try:
+            message = json.loads(line)
+            if not isinstance(message, dict):
+                raise ValueError("a request must be a JSON object")
+            request = message
+            response = await self.dispatch(request)
+        except ValueError as exc:
+            response = {"error": str(exc)}
+        except Exception as exc:
+            response = {"error": f"{type(exc).__name__}: {exc}"}
+        finally:
+            inflight.release()
+        busy = response.get("error") == "busy"
+        if "error" in response and not busy:
+            self.counts["errors"] += 1
+        if "id" in request:
+            response["id"] = request["id"]
+        op = request.get("op")
+        if op in self._latency and not busy:
+            self._latency[op].append(time.perf_counter() - start)
+        async with write_lock:
+            writer.write(json.dumps(response).encode() + b"\n")
+            try:
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+    async def dispatch(self, request):
+        self.counts["requests"] += 1
+        op = request.get("op")
+        if op == "create":
+            return self.create(request.get("ai", self.ai))
+        if op == "stats":
+            return self.stats()
+        session = self.sessions.get(request.get("game"))
+        if session is None:
+            raise ValueError(f"no game {request.get('game')!r}")
+        session.used = time.monotonic()
+        async with session.lock:
+            if op == "legal":
+                return {"moves": [(*ROWCOL[src], *ROWCOL[dst]) for src, dst, _ in session.legal()]}
+            if op == "state":
+                return session.view()
+            if op == "move":
+                return self.move(session, request.get("move"))
+            if op == "ai_move":
+                return await self.ai_move(session, request.get("time"))
+            if op == "close":
+                del self.sessions[request["game"]]
+                return {"ok": True}
+        raise ValueError(f"unknown op {op!r}")
+
+    def create(self, ai):
+        parse_spec(ai)
+        self._next_game += 1
+        game = self._next_game
+        self.sessions[game] = Session(ai)
+        self.counts["games_created"] += 1
+        return {"game": game, **self.sessions[game].view()}
+
+    def _played(self, session):
+        session.plies += 1
+        view = session.view()
+        if view["status"] != "playing":
+            self.counts["games_finished"] += 1
+        return view
+
+    def move(self, session, move):
+        if session.status() != "playing":
+            raise ValueError("game is over")
+        if not isinstance(move, list) or len(move) != 4:
+            raise ValueError("move must be [sr, sc, er, ec]")
+        if not session.env.play_move(*map(int, move)):
+            return {"ok": False, **session.view()}
+        return {"ok": True, **self._played(session)}
+
+    async def ai_move(self, session, limit):
+        if session.status() != "playing":
+            raise ValueError("game is over")
+        limit = self.move_time if limit is None else float(limit)
+        if not math.isfinite(limit):
+            raise ValueError("time must be a number of seconds")
+        limit = min(max(limit, SERVER_MIN_MOVE_TIME), self.max_move_time)
+        if self.engine_pending >= self.engine_capacity:
+            self.counts["busy"] += 1
+            return {"error": "busy"}
+        env = session.env
+        loop = asyncio.get_running_loop()
+        future = self.pool.submit(_engine_move, session.ai, env.turn, env.board.snapshot(),
+                                  session.chain(), limit)
+        # The slot is held until the pool is done with the search, not until
+        # we stop waiting for it, so a timed-out search still counts as busy.
+        self.engine_pending += 1
+        future.add_done_callback(lambda _: loop.is_closed() or loop.call_soon_threadsafe(self._engine_done))
+        # The search stops itself at `limit`; the rest allows for the queue ahead of it.
+        wait = limit * (1 + self.engine_pending / self.workers) + ENGINE_GRACE
+        try:
+            coords, nodes = await asyncio.wait_for(asyncio.wrap_future(future), wait)
+        except asyncio.TimeoutError:
+            self.counts["timeouts"] += 1
+            return {"error": "timeout"}
+        if coords is None or not env.play_move(*coords):
+            raise ValueError(f"engine returned an illegal move {coords}")
+        self.counts["ai_moves"] += 1
+        metrics.count("server.ai_nodes", nodes)
+        return {"move": coords, "nodes": nodes, **self._played(session)}
+
+    def _engine_done(self):
+        self.engine_pending -= 1
+
+    def stats(self):
+        latency = {}
+        for op, values in self._latency.items():
+            if values:
+                ms = np.array(values) * 1000
+                latency[op] = {"p50_ms": float(np.percentile(ms, 50)), "p99_ms": float(np.percentile(ms, 99))}
+        return {**self.counts, "sessions": len(self.sessions), "engine_pending": self.engine_pending,
+                "workers": self.workers, "latency": latency}
+
+    async def _reap(self):
+        """Drop sessions nobody has touched for session_ttl seconds."""
+        while True:
+            await asyncio.sleep(min(60, self.session_ttl))
+            cutoff = time.monotonic() - self.session_ttl
+            for game in [g for g, s in self.sessions.items() if s.used < cutoff and not s.lock.locked()]:
+                del self.sessions[game]
+                self.counts["expired"] += 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless multi-game checkers server.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, help="engine processes (default: one per core)")
+    parser.add_argument("--ai", default=SERVER_AI, help="default agent spec for ai_move")
+    parser.add_argument("--move-time", type=float, default=SERVER_MOVE_TIME)
+    args = parser.parse_args(argv)
+    parse_spec(args.ai)
+
+    from utils.loggers import setup_logging
+    setup_logging()
+    server = GameServer(args.workers, args.ai, args.move_time)
+    print(f"serving on {args.host}:{args.port} with {server.workers} engine workers")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
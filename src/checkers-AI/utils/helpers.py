@@ -1,5 +1,5 @@
 import numpy as np
-from config import WHITE
+from config import WHITE, STATE_SHAPE
 
 def state_to_input(state):
     """
@@ -16,4 +16,20 @@ def state_to_input(state):
                 if piece.king:
                     val *= 2
             arr[r, c] = val
-    return arr.reshape((*arr.shape, 1))
\ No newline at end of file
+    return arr.reshape((*arr.shape, 1))
+
+
+def _bits(bb, n):
+    return np.unpackbits(np.frombuffer(bb.to_bytes((n + 7) // 8, "little"), dtype=np.uint8),
+                         count=n, bitorder="little").view(np.int8)
+
+
+def board_to_input(board):
+    """
+    Same encoding as state_to_input, read straight from a Board's bitboards
+    into an int8 array without building the Piece grid.
+    """
+    n = STATE_SHAPE[0] * STATE_SHAPE[1]
+    arr = _bits(board.white_bb, n) - _bits(board.red_bb, n)
+    arr *= 1 + _bits(board.king_bb, n)
+    return arr.reshape(STATE_SHAPE)
\ No newline at end of file
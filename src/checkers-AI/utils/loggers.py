@@ -1,14 +1,212 @@
-import csv
-from datetime import datetime
+import logging
+import os
+import queue
+import threading
+import time
+import numpy as np
+from config import LOG_LEVEL, LOG_INTERVAL, STATE_SHAPE, GAME_LOG_PATH, GAME_LOG_BUFFER
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let each message template through at most once per `interval` seconds
+    for records below WARNING; the next one that passes says how many
+    were dropped in between.
+    """
+    def __init__(self, interval=LOG_INTERVAL):
+        super().__init__()
+        self.interval = interval
+        self._last = {}
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.interval:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        last, dropped = self._last.get(key, (None, 0))
+        if last is not None and now - last < self.interval:
+            self._last[key] = (last, dropped + 1)
+            return False
+        self._last[key] = (now, 0)
+        if dropped:
+            record.msg = f"{record.msg} ({dropped} similar suppressed)"
+        return True
+
+
+def setup_logging(level=LOG_LEVEL, interval=LOG_INTERVAL):
+    """Console logging at `level` with repeats rate-limited; safe to call more than once."""
+    root = logging.getLogger()
+    if not any(getattr(h, "_checkers", False) for h in root.handlers):
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s",
+                                               "%H:%M:%S"))
+        handler.addFilter(RateLimitFilter(interval))
+        handler._checkers = True
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+# Game records are a sequence of chunks, each one np.save()d array per
+# column in this order, so a file can be appended to in pieces and read
+# back chunk by chunk with plain np.load().
+RECORD_COLUMNS = (("states", np.int8), ("actions", np.int16),
+                  ("rewards", np.float32), ("games", np.int32))
+
 
 class Logger:
-    def __init__(self, filename="data/game_logs.csv"):
+    """
+    Buffered game-record writer.
+
+    log() copies one move into preallocated NumPy columns; every
+    `buffer_size` rows the columns are handed to a writer thread (or
+    written in place when `background` is False), so the caller never
+    waits on the disk. Rows carry the id of the game they belong to:
+    new_game() starts the next id, or pass `game` explicitly. Read the
+    file back with read_game_records().
+    """
+    def __init__(self, filename=GAME_LOG_PATH, buffer_size=GAME_LOG_BUFFER,
+                 state_shape=STATE_SHAPE, background=True):
         self.filename = filename
-        with open(self.filename, 'w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow(['timestamp', 'state', 'action', 'reward'])
-
-    def log(self, state, action, reward):
-        with open(self.filename, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([datetime.now().isoformat(), state.tolist(), action, reward])
\ No newline at end of file
+        self.buffer_size = buffer_size
+        self.state_shape = state_shape
+        self.game = 0
+        self.rows = 0
+        folder = os.path.dirname(filename)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._file = open(filename, "wb")
+        self._new_buffer()
+        self._error = None
+        self._queue = None
+        if background:
+            self._queue = queue.Queue(maxsize=8)
+            self._thread = threading.Thread(target=self._drain, daemon=True)
+            self._thread.start()
+
+    def _new_buffer(self):
+        self._columns = tuple(np.empty((self.buffer_size, *self.state_shape) if name == "states"
+                                       else self.buffer_size, dtype=dtype)
+                              for name, dtype in RECORD_COLUMNS)
+        self._n = 0
+
+    def new_game(self):
+        self.game += 1
+        return self.game
+
+    def log(self, state, action, reward, game=None):
+        states, actions, rewards, games = self._columns
+        i = self._n
+        states[i] = state
+        actions[i] = action
+        rewards[i] = reward
+        games[i] = self.game if game is None else game
+        self._n = i + 1
+        if self._n == self.buffer_size:
+            self._submit()
+
+    def log_batch(self, states, actions, rewards, games=None):
+        """Several rows at once, e.g. one step of a VectorCheckersEnv."""
+        if games is None:
+            games = np.full(len(actions), self.game)
+        states, actions, rewards, games = map(np.asarray, (states, actions, rewards, games))
+        start = 0
+        while start < len(actions):
+            take = min(self.buffer_size - self._n, len(actions) - start)
+            rows = slice(self._n, self._n + take)
+            part = slice(start, start + take)
+            for column, values in zip(self._columns, (states, actions, rewards, games)):
+                column[rows] = values[part]
+            self._n += take
+            start += take
+            if self._n == self.buffer_size:
+                self._submit()
+
+    def _submit(self):
+        if not self._n:
+            return
+        chunk = tuple(column[:self._n] for column in self._columns)
+        self.rows += self._n
+        self._new_buffer()
+        if self._error is not None:
+            raise self._error
+        if self._queue is None:
+            self._write(chunk)
+        else:
+            self._queue.put(chunk)
+
+    def _write(self, chunk):
+        for column in chunk:
+            np.save(self._file, column)
+        self._file.flush()
+
+    def _drain(self):
+        while True:
+            chunk = self._queue.get()
+            try:
+                if chunk is not None and self._error is None:
+                    self._write(chunk)
+            except Exception as exc:
+                self._error = exc
+            finally:
+                self._queue.task_done()
+            if chunk is None:
+                return
+
+    def flush(self):
+        """Write everything logged so far and wait until it is on disk."""
+        self._submit()
+        if self._queue is not None:
+            self._queue.join()
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        if self._file.closed:
+            return
+        try:
+            self.flush()
+        finally:
+            if self._queue is not None:
+                self._queue.put(None)
+                self._thread.join()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _record_chunks(path):
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        while f.tell() < size:
+            try:
+                chunk = tuple(np.load(f) for _ in RECORD_COLUMNS)
+            except (ValueError, EOFError, OSError):
+                # A chunk cut short by a crash mid-write; the rest is lost.
+                return
+            yield chunk
+
+
+def read_game_records(path, batch_size=None):
+    """
+    Stream a Logger file as (states, actions, rewards, games) NumPy tuples:
+    one per written chunk, or exactly `batch_size` rows each (the last may
+    be shorter). Only about one chunk is held in memory at a time.
+    """
+    if batch_size is None:
+        yield from _record_chunks(path)
+        return
+    pending = []
+    for chunk in _record_chunks(path):
+        pending.append(chunk)
+        merged = tuple(np.concatenate(column) for column in zip(*pending)) if len(pending) > 1 else chunk
+        start = 0
+        while len(merged[0]) - start >= batch_size:
+            yield tuple(column[start:start + batch_size] for column in merged)
+            start += batch_size
+        pending = [tuple(column[start:] for column in merged)]
+    if pending and len(pending[0][0]):
+        yield pending[0]
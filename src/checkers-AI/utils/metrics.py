@@ -0,0 +1,90 @@
+"""
+Process-wide counters and timers.
+
+    from utils.metrics import metrics
+    metrics.count("env.steps")
+    with metrics.timer("train.step"):
+        ...
+    metrics.save("data/metrics.json")  # or .csv
+
+A counter is an int in a dict and a timer keeps [count, total, max]
+seconds, so recording costs well under a microsecond and stays on all
+the time. Hot loops (board move generation) bump `COUNTERS[name]`
+directly; the search keeps its own per-search tallies and adds them here
+once per search.
+"""
+import csv
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+
+class Metrics:
+    def __init__(self):
+        self.counters = defaultdict(int)
+        self.timers = {}
+        self.started = time.time()
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def observe(self, name, seconds):
+        timer = self.timers.get(name)
+        if timer is None:
+            self.timers[name] = [1, seconds, seconds]
+        else:
+            timer[0] += 1
+            timer[1] += seconds
+            if seconds > timer[2]:
+                timer[2] = seconds
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def reset(self):
+        self.counters.clear()
+        self.timers.clear()
+        self.started = time.time()
+
+    def snapshot(self):
+        """Plain dict of everything recorded since start or the last reset()."""
+        return {
+            "time": time.time(),
+            "elapsed": time.time() - self.started,
+            "counters": dict(self.counters),
+            "timers": {name: {"count": n, "total": total, "mean": total / n, "max": peak}
+                       for name, (n, total, peak) in self.timers.items()},
+        }
+
+    def rows(self):
+        """(name, kind, count, total, mean, max) per metric, for CSV and printing."""
+        snap = self.snapshot()
+        rows = [(name, "counter", value, "", "", "") for name, value in sorted(snap["counters"].items())]
+        rows += [(name, "timer", t["count"], t["total"], t["mean"], t["max"])
+                 for name, t in sorted(snap["timers"].items())]
+        return rows
+
+    def save(self, path):
+        """Write a snapshot as JSON, or as CSV rows when `path` ends in .csv."""
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, "w", newline="") as f:
+            if path.endswith(".csv"):
+                writer = csv.writer(f)
+                writer.writerow(["name", "kind", "count", "total", "mean", "max"])
+                writer.writerows(self.rows())
+            else:
+                json.dump(self.snapshot(), f, indent=2)
+        return path
+
+
+metrics = Metrics()
+COUNTERS = metrics.counters